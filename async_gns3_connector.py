@@ -0,0 +1,298 @@
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from data_structure.computes import ComputeInput, ComputeOutput, ComputesResponse
+from data_structure.links import LinkNode, LinkRequest, LinkResponse, LinksResponse
+from data_structure.nodes import Node, NodesResponse, Port
+from data_structure.projects import LoadProjectResponse, Project, ProjectsResponse
+from data_structure.records import NodeRecord
+from data_structure.templates import Template, TemplatesResponse
+from gns3_connector import GNS3Connector
+from project_state import ProjectState
+from request_metrics import RequestMetrics
+
+
+class AsyncGNS3Connector:
+
+    vpcs_symbol_path = GNS3Connector.vpcs_symbol_path
+    ethernet_switch_symbol_path = GNS3Connector.ethernet_switch_symbol_path
+    router_symbol_path = GNS3Connector.router_symbol_path
+
+    def __init__(self, url, username, password, max_concurrency: int = 64, use_cache: bool = False):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.state: Optional[ProjectState] = ProjectState() if use_cache else None
+        self.metrics = RequestMetrics()
+        self.project_id: Optional[str] = None
+        self.compute_id: Optional[str] = None
+
+    @classmethod
+    async def connect(
+        cls, url, username, password, project_name="untitled", max_concurrency: int = 64, use_cache: bool = False
+    ) -> "AsyncGNS3Connector":
+        connector = cls(url, username, password, max_concurrency, use_cache)
+        await connector.open(project_name)
+        return connector
+
+    async def open(self, project_name="untitled") -> None:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+            )
+        self.project_id = (await self.load_project(project_name)).project_id
+        self.compute_id = (await self.get_computes()).computes[0].compute_id
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> "AsyncGNS3Connector":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _make_request(self, method, endpoint, **kwargs):
+        url = f"{self.url}{endpoint}"
+        async with self.semaphore:
+            start = time.perf_counter()
+            async with self.session.request(method, url, **kwargs) as response:
+                body = await response.read()
+                status = response.status
+                if status >= 400:
+                    print(f"Warning: {status} {response.reason} for url: {url}")
+            latency = time.perf_counter() - start
+        decode_start = time.perf_counter()
+        data = json.loads(body) if body else {}
+        self.metrics.record_request(method, endpoint, status, latency, len(body), time.perf_counter() - decode_start)
+        return data
+
+    # Appliance Endpoints
+    async def get_appliances(self):
+        return await self._make_request("GET", "/v2/appliances")
+
+    async def get_compute(self, compute_id):
+        return await self._make_request("GET", f"/v2/computes/{compute_id}")
+
+    # Link Endpoints
+    async def get_all_links(self, project_id: str) -> LinksResponse:
+        data = await self._make_request("GET", f"/v2/projects/{project_id}/links")
+        return LinksResponse(links=[LinkResponse(**link) for link in data])
+
+    async def get_link(self, project_id, link_id):
+        return await self._make_request("GET", f"/v2/projects/{project_id}/links/{link_id}")
+
+    async def delete_link(self, project_id: str, link_id: str):
+        data = await self._make_request("DELETE", f"/v2/projects/{project_id}/links/{link_id}")
+        if self.state and project_id == self.project_id:
+            self.state.remove_link(link_id)
+        return data
+
+    # Project Endpoints
+    async def get_projects(self) -> ProjectsResponse:
+        data = await self._make_request("GET", "/v2/projects")
+        return ProjectsResponse(projects=[Project(**project) for project in data])
+
+    async def get_project(self, project_id):
+        return await self._make_request("GET", f"/v2/projects/{project_id}")
+
+    # Server Endpoints
+    async def get_version(self):
+        return await self._make_request("GET", "/v2/version")
+
+    # Snapshot Endpoints
+    async def get_snapshots(self, project_id):
+        return await self._make_request("GET", f"/v2/projects/{project_id}/snapshots")
+
+    async def restore_snapshot(self, project_id, snapshot_id):
+        return await self._make_request("POST", f"/v2/projects/{project_id}/snapshots/{snapshot_id}/restore")
+
+    # Template Endpoints
+    async def get_templates(self) -> TemplatesResponse:
+        data = await self._make_request("GET", "/v2/templates")
+        return TemplatesResponse(templates=[Template(**template) for template in data])
+
+    async def get_template(self, template_id):
+        return await self._make_request("GET", f"/v2/templates/{template_id}")
+
+    async def load_project(self, project_name) -> LoadProjectResponse:
+        projects = await self.get_projects()
+        full_path = None
+        for project in projects.projects:
+            if project_name in project.name:
+                full_path = f"{project.path}/{project.name}.gns3"
+                break
+        if not full_path:
+            raise ValueError(f"Project {project_name} not found")
+
+        data = await self._make_request("POST", "/v2/projects/load", json={"path": full_path})
+        if self.state:
+            self.state.clear()
+        return LoadProjectResponse(**data)
+
+    # Local state cache
+    async def enable_cache(self) -> ProjectState:
+        if not self.state:
+            self.state = ProjectState()
+        return await self.refresh_cache()
+
+    async def refresh_cache(self) -> ProjectState:
+        if not self.state:
+            raise ValueError("State cache is disabled, call enable_cache first")
+        nodes, links = await asyncio.gather(self.get_nodes(self.project_id), self.get_all_links(self.project_id))
+        self.state.load(nodes, links.links)
+        return self.state
+
+    def invalidate_cache(self) -> None:
+        if self.state:
+            self.state.clear()
+
+    async def _get_state(self) -> Optional[ProjectState]:
+        if self.state and not self.state.loaded:
+            await self.refresh_cache()
+        return self.state
+
+    async def create_node(
+        self,
+        project_id: str,
+        compute_id,
+        node_name: str,
+        node_type: str,
+        symbol: str,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> Node:
+        node_data = {"name": node_name, "symbol": symbol, "node_type": node_type, "compute_id": compute_id}
+        if position:
+            node_data["x"], node_data["y"] = position
+        data = await self._make_request("POST", f"/v2/projects/{project_id}/nodes", json=node_data)
+        node = Node(**data)
+        if self.state and self.state.loaded and project_id == self.project_id:
+            self.state.add_node(node)
+        return node
+
+    async def get_nodes(self, project_id: str, fields: Optional[Iterable[str]] = None) -> List[Node]:
+        data = await self._make_request("GET", f"/v2/projects/{project_id}/nodes")
+        if fields:
+            return NodeRecord.from_json_list(data, fields)
+        return NodesResponse(nodes=[Node(**node) for node in data]).nodes
+
+    async def get_node(self, project_id: str, node_id: str) -> Node:
+        data = await self._make_request("GET", f"/v2/projects/{project_id}/nodes/{node_id}")
+        return Node(**data)
+
+    async def get_node_by_name(self, node_name: str) -> Optional[Node]:
+        state = await self._get_state()
+        if state:
+            return state.get_node_by_name(node_name)
+        for node in await self.get_nodes(self.project_id):
+            if node.name == node_name:
+                return node
+        return None
+
+    async def register_compute(self, compute_data: ComputeInput) -> ComputeOutput:
+        data = await self._make_request("POST", "/v2/computes", json=compute_data.model_dump())
+        return ComputeOutput(**data)
+
+    async def get_computes(self) -> ComputesResponse:
+        data = await self._make_request("GET", "/v2/computes")
+        return ComputesResponse(computes=[ComputeOutput(**compute) for compute in data])
+
+    async def create_switch(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return await self.create_node(
+            self.project_id,
+            compute_id or self.compute_id,
+            name,
+            "ethernet_switch",
+            self.ethernet_switch_symbol_path,
+            position,
+        )
+
+    async def create_vpcs(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return await self.create_node(
+            self.project_id, compute_id or self.compute_id, name, "vpcs", self.vpcs_symbol_path, position
+        )
+
+    async def create_router(
+        self, router_name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return await self.create_node(
+            self.project_id,
+            compute_id or self.compute_id,
+            router_name,
+            "ethernet_switch",
+            self.router_symbol_path,
+            position,
+        )
+
+    async def create_link(
+        self, first_node_name: str, second_node_name: str, first_node_port: LinkNode, second_node_port: LinkNode
+    ) -> LinkResponse | Dict:
+        first_node, second_node = await asyncio.gather(
+            self.get_node_by_name(first_node_name), self.get_node_by_name(second_node_name)
+        )
+        if not first_node:
+            raise ValueError(f"Must have a node but {first_node_name} didn't match any known node.")
+        if not second_node:
+            raise ValueError(f"Must have a node but {second_node_name} didn't match any known node.")
+        return await self.create_link_from_ports(
+            LinkNode(
+                node_id=first_node.node_id,
+                adapter_number=first_node_port.adapter_number,
+                port_number=first_node_port.port_number,
+            ),
+            LinkNode(
+                node_id=second_node.node_id,
+                adapter_number=second_node_port.adapter_number,
+                port_number=second_node_port.port_number,
+            ),
+        )
+
+    async def create_link_from_ports(
+        self, first_node_port: LinkNode, second_node_port: LinkNode
+    ) -> LinkResponse | Dict:
+        link_data = LinkRequest(nodes=[first_node_port, second_node_port]).model_dump()
+        data = await self._make_request("POST", f"/v2/projects/{self.project_id}/links", json=link_data)
+        if data.get("message"):
+            return data
+        link = LinkResponse(**data)
+        if self.state and self.state.loaded:
+            self.state.add_link(link)
+        return link
+
+    async def get_links_from_node(self, project_id: str, node_id: str) -> LinksResponse:
+        links = await self.get_all_links(project_id)
+        return LinksResponse(
+            links=[link for link in links.links if any(node.node_id == node_id for node in link.nodes)]
+        )
+
+    async def get_free_port_for_node(self, project_id: str, node_name: str) -> Optional[Port]:
+        node = await self.get_node_by_name(node_name)
+        state = await self._get_state()
+        if state:
+            used = state.used_ports.get(node.node_id, set())
+        else:
+            links = await self.get_links_from_node(project_id, node.node_id)
+            used = {
+                (link_node.adapter_number, link_node.port_number)
+                for link in links.links
+                for link_node in link.nodes
+                if link_node.node_id == node.node_id
+            }
+        for port in node.ports:
+            if (port.adapter_number, port.port_number) not in used:
+                return port
+        return None
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Optional, Tuple
+
+from async_gns3_connector import AsyncGNS3Connector
+from data_structure.links import LinkResponse
+from data_structure.nodes import Node
+from data_structure.records import PORT_FIELDS
+from port_allocator import PortAllocator
+
+
+class AsyncHyperInterface:
+    def __init__(self, connector: AsyncGNS3Connector) -> None:
+        self.connector: AsyncGNS3Connector = connector
+        self.port_allocator: Optional[PortAllocator] = None
+        self._allocator_lock = asyncio.Lock()
+
+    async def get_port_allocator(self) -> PortAllocator:
+        async with self._allocator_lock:
+            if self.port_allocator is None:
+                state = self.connector.state
+                if state and state.loaded:
+                    nodes, links = list(state.nodes_by_id.values()), list(state.links.values())
+                else:
+                    nodes, links_response = await asyncio.gather(
+                        self.connector.get_nodes(self.connector.project_id, fields=PORT_FIELDS),
+                        self.connector.get_all_links(self.connector.project_id),
+                    )
+                    links = links_response.links
+                self.port_allocator = PortAllocator.from_project(nodes, links)
+            return self.port_allocator
+
+    def _register_node(self, node: Node) -> Node:
+        if self.port_allocator is not None:
+            self.port_allocator.register_node(node)
+        return node
+
+    async def create_switch(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(await self.connector.create_switch(name, compute_id, position))
+
+    async def create_vpcs(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(await self.connector.create_vpcs(name, compute_id, position))
+
+    async def create_router(
+        self, router_name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(await self.connector.create_router(router_name, compute_id, position))
+
+    async def create(
+        self, kind: str, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        if kind == "vpcs":
+            return await self.create_vpcs(name, compute_id, position)
+        if kind == "switch":
+            return await self.create_switch(name, compute_id, position)
+        if kind == "router":
+            return await self.create_router(name, compute_id, position)
+        raise ValueError(f"Unknown node kind {kind}")
+
+    async def create_link(self, first_node_name: str, second_node_name: str) -> LinkResponse:
+        allocator = await self.get_port_allocator()
+        first_node_port = allocator.reserve(first_node_name)
+        try:
+            second_node_port = allocator.reserve(second_node_name)
+        except ValueError:
+            allocator.release(first_node_port)
+            raise
+        link = await self.connector.create_link_from_ports(first_node_port, second_node_port)
+        if isinstance(link, dict):
+            allocator.release(first_node_port)
+            allocator.release(second_node_port)
+            raise ValueError(f"Link {first_node_name}-{second_node_name} refused: {link.get('message')}")
+        allocator.attach_link(link)
+        return link
+
+    async def delete_link(self, link_id: str):
+        data = await self.connector.delete_link(self.connector.project_id, link_id)
+        if self.port_allocator is not None:
+            self.port_allocator.release_link(link_id)
+        return data
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gns3_connector import GNS3Connector
+from interface import HyperInterface
+from main import STAR_CHAIN_AREA_SIZE, GlobalTopology, TopologyGenerator
+from mock_gns3_server import MockGNS3Server
+
+STRATEGIES = ("sequential", "threaded", "async", "file")
+
+
+def build_topology(size: int) -> GlobalTopology:
+    # Each area takes its leaves, its central switch and one medium router
+    return GlobalTopology.star_chain(max(1, size // (STAR_CHAIN_AREA_SIZE + 2)))
+
+
+def run_strategy(strategy: str, server: MockGNS3Server, topology: GlobalTopology, workers: int):
+    connector = GNS3Connector(server.url, "gns3", "gns3")
+    interface = HyperInterface(connector)
+    generator = TopologyGenerator()
+    if strategy == "sequential":
+        generator.deploy(interface, topology)
+    elif strategy == "threaded":
+        generator.deploy(interface, topology, workers=workers)
+    elif strategy == "async":
+        from async_gns3_connector import AsyncGNS3Connector
+        from async_interface import AsyncHyperInterface
+
+        async def deploy_async():
+            async with await AsyncGNS3Connector.connect(
+                server.url, "gns3", "gns3", max_concurrency=workers
+            ) as async_connector:
+                await generator.deploy_async(AsyncHyperInterface(async_connector), topology)
+
+        asyncio.run(deploy_async())
+    elif strategy == "file":
+        with tempfile.TemporaryDirectory() as directory:
+            generator.deploy_file(interface, topology, directory, f"bench-{time.time_ns()}")
+    else:
+        raise ValueError(f"Unknown strategy {strategy}")
+
+
+def benchmark(strategy: str, size: int, latency: float, workers: int):
+    topology = build_topology(size)
+    node_count = len(topology.deploy_nodes())
+    link_count = len(topology.deploy_links())
+    with MockGNS3Server(latency=latency) as server:
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_strategy(strategy, server, topology, workers)
+        wall_time = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = server.stats()
+    return node_count, link_count, wall_time, stats, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy benchmarks against the local mock GNS3 server")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--latency", type=float, default=0.001, help="Per-request latency in seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    print(
+        f"{'strategy':10} {'nodes':>6} {'links':>6} {'wall(s)':>8} {'requests':>8} "
+        f"{'sent(kB)':>9} {'recv(kB)':>9} {'peak(MB)':>8}"
+    )
+    for size in args.sizes:
+        for strategy in args.strategies:
+            nodes, links, wall_time, stats, peak = benchmark(strategy, size, args.latency, args.workers)
+            print(
+                f"{strategy:10} {nodes:>6} {links:>6} {wall_time:>8.2f} {stats['requests']:>8} "
+                f"{stats['bytes_received'] / 1e3:>9.1f} {stats['bytes_sent'] / 1e3:>9.1f} {peak / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("matplotlib", "networkx", "numpy")
+PROBE = (
+    "import sys, time; start = time.perf_counter(); import {module}; elapsed = time.perf_counter() - start; "
+    "print(elapsed); print(','.join(name for name in {heavy!r} if name in sys.modules))"
+)
+
+
+def measure(module: str, repeat: int):
+    best = float("inf")
+    loaded = ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split("\n")
+        best = min(best, float(output[0]))
+        loaded = output[1]
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup import time against a budget")
+    parser.add_argument("--budget", type=float, default=0.5, help="Maximum import time in seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=["cli", "main", "gns3_connector"])
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        elapsed, loaded = measure(module, args.repeat)
+        over_budget = elapsed > args.budget
+        failed = failed or over_budget or bool(loaded)
+        status = "FAIL" if over_budget or loaded else "ok"
+        print(f"{module:16} {elapsed * 1000:8.1f}ms {status}" + (f" (heavy imports: {loaded})" if loaded else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_structure.nodes import Node, NodesResponse
+from data_structure.records import PORT_FIELDS, NodeRecord
+from mock_gns3_server import make_node
+
+
+def timed(function, payload, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pydantic validation with fast-parse records for GET nodes")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = [
+        make_node("project", {"name": f"N{index}", "node_type": "ethernet_switch" if index % 10 == 0 else "vpcs"})
+        for index in range(args.nodes)
+    ]
+    modes = {
+        "pydantic": lambda data: NodesResponse(nodes=[Node(**node) for node in data]).nodes,
+        "records": lambda data: NodeRecord.from_json_list(data),
+        "projected": lambda data: NodeRecord.from_json_list(data, PORT_FIELDS),
+    }
+    baseline = None
+    for name, function in modes.items():
+        elapsed = timed(function, payload, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:10} {elapsed * 1000:8.1f}ms {elapsed / args.nodes * 1e6:6.2f}us/node x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
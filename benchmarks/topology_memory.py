@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import tracemalloc
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GlobalTopology, TopologyArea
+
+
+def add_nodes(topology: GlobalTopology, areas: int, nodes_per_area: int) -> List[TopologyArea]:
+    created = []
+    for area_index in range(areas):
+        area = topology.create_area(f"A{area_index}")
+        for node_index in range(nodes_per_area):
+            area.create_node(f"N{node_index}", link_to_central=False)
+        created.append(area)
+    return created
+
+
+def add_links(topology: GlobalTopology, areas: List[TopologyArea]) -> None:
+    for index, area in enumerate(areas):
+        for node in area.nodes:
+            area.create_link(area.central_node, node)
+        if index:
+            topology.create_link(areas[index - 1], area)
+
+
+def traced(build) -> Tuple[object, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def report(name: str, nodes: int, links: int, node_bytes: int, link_bytes: int) -> None:
+    total = (node_bytes + link_bytes) / 1e6
+    print(
+        f"{name:8} nodes={nodes} links={links} total={total:.1f}MB "
+        f"bytes/node={node_bytes / nodes:.0f} bytes/link={link_bytes / links:.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint of the topology representations")
+    parser.add_argument("--areas", type=int, default=100)
+    parser.add_argument("--nodes-per-area", type=int, default=1000)
+    args = parser.parse_args()
+    # Both forms hold the same topology: nodes are measured first, then the links added on top,
+    # and the compact form is what to_compact() makes of the objects at each step. Medium routers
+    # come with their area links, so they count as link memory
+    topology = GlobalTopology()
+    areas, object_node_bytes = traced(lambda: add_nodes(topology, args.areas, args.nodes_per_area))
+    nodes_only, compact_node_bytes = traced(topology.to_compact)
+    nodes = nodes_only.node_count()
+    del nodes_only
+    _, object_link_bytes = traced(lambda: add_links(topology, areas))
+    compact, compact_bytes = traced(topology.to_compact)
+    links = compact.link_count()
+    report("objects", nodes, links, object_node_bytes, object_link_bytes)
+    report("compact", nodes, links, compact_node_bytes, compact_bytes - compact_node_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from deploy_plan import DEFAULT_PORT_COUNTS
+from interface import KIND_NODE_TYPES
+
+CASCADE_PATTERN = "{node}-Cascade{index}"
+REPORT_LIMIT = 20
+
+
+def port_budgets(templates: Optional[Iterable] = None) -> Dict[str, int]:
+    # Nodes are created from their node type, not a template, so they get the ports of
+    # the builtin template for that type; without templates fall back to the defaults
+    budgets = dict(DEFAULT_PORT_COUNTS)
+    for template in templates or ():
+        if not template.builtin or not template.ports_mapping:
+            continue
+        for kind, node_type in KIND_NODE_TYPES.items():
+            if node_type == template.template_type:
+                budgets[kind] = len(template.ports_mapping)
+    return budgets
+
+
+class CapacityReport:
+    def __init__(self, budgets: Dict[str, int]) -> None:
+        self.budgets = budgets
+        # (name, kind, area, degree, budget)
+        self.oversubscribed: List[Tuple[str, str, str, int, int]] = []
+
+    def is_ok(self) -> bool:
+        return not self.oversubscribed
+
+    def __str__(self):
+        if self.is_ok():
+            return "Port capacity: every node fits its port budget"
+        lines = [f"Port capacity: {len(self.oversubscribed)} nodes have more links than ports"]
+        for name, kind, _, degree, budget in self.oversubscribed[:REPORT_LIMIT]:
+            lines.append(f"  {name} ({kind}): {degree} links, {budget} ports")
+        if len(self.oversubscribed) > REPORT_LIMIT:
+            lines.append(f"  ... and {len(self.oversubscribed) - REPORT_LIMIT} more")
+        return "\n".join(lines)
+
+
+def node_degrees(links: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+    degrees: Dict[str, int] = {}
+    for source, target in links:
+        degrees[source] = degrees.get(source, 0) + 1
+        degrees[target] = degrees.get(target, 0) + 1
+    return degrees
+
+
+def check_capacity(
+    nodes: Iterable[Tuple[str, str, str]], links: Iterable[Tuple[str, str]], budgets: Dict[str, int]
+) -> CapacityReport:
+    report = CapacityReport(budgets)
+    degrees = node_degrees(links)
+    for name, kind, area in nodes:
+        budget = budgets.get(kind)
+        if budget is None:
+            raise ValueError(f"No port budget for node kind {kind}")
+        if degrees.get(name, 0) > budget:
+            report.oversubscribed.append((name, kind, area, degrees[name], budget))
+    return report
+
+
+def cascade_topology(topology, budgets: Dict[str, int]) -> List:
+    # Moves the intra-area links of every oversubscribed node behind new switches: each
+    # cascade switch takes up to (switch ports - 1) of the links and one uplink back, and
+    # cascades are nested until the node fits. Inter-area links stay where they are.
+    # Returns the switches added.
+    switch_ports = budgets["switch"]
+    if switch_ports < 3:
+        raise ValueError(f"Cascading needs switches with at least 3 ports, got {switch_ports}")
+    fixed = node_degrees((link.source_node.name, link.target_node.name) for link in topology.links)
+    report = check_capacity(topology.deploy_nodes(), topology.deploy_links(), budgets)
+    added = []
+    for name, _, area_name, _, budget in report.oversubscribed:
+        area = topology.get_area(area_name)
+        if not area.has_node(name):
+            # Medium routers only carry inter-area links
+            continue
+        node = area.get_node(name)
+        free = budget - fixed.get(name, 0)
+        # Sorted so the same topology always cascades the same way
+        items = sorted(area.get_neighbors(node), key=lambda neighbor: neighbor.name)
+        if free < 1 or len(items) <= free:
+            continue
+        for neighbor in items:
+            area.remove_link(node, neighbor)
+
+        short_name = name[len(area.name) + 1 :]
+        index = 0
+        while len(items) > free:
+            take = min(switch_ports - 1, len(items) - free + 1)
+            group, items = items[-take:], items[:-take]
+            index += 1
+            while area.has_node(f"{area.name}-{CASCADE_PATTERN.format(node=short_name, index=index)}"):
+                index += 1
+            cascade = area.create_node(CASCADE_PATTERN.format(node=short_name, index=index), False, "Switch")
+            for member in group:
+                area.create_link(cascade, member)
+            items.insert(0, cascade)
+            added.append(cascade)
+        for item in items:
+            area.create_link(node, item)
+    return added
+
+
+def place_cascades(cascades: List, positions: Dict[str, Tuple[int, int]]) -> None:
+    # Each cascade switch sits in the middle of the nodes it connects; nested cascades
+    # come first in the list, so their position is known by the time their parent is placed
+    for cascade in cascades:
+        neighbors = [positions[node.name] for node in cascade.area.get_neighbors(cascade) if node.name in positions]
+        if neighbors:
+            positions[cascade.name] = (
+                round(sum(x for x, _ in neighbors) / len(neighbors)),
+                round(sum(y for _, y in neighbors) / len(neighbors)),
+            )
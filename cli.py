@@ -0,0 +1,392 @@
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+from compute_scheduler import ComputeScheduler
+from main import GlobalTopology, TopologyGenerator
+
+SHAPES = ("star", "ring", "mesh", "tree", "fat_tree", "random")
+FABRICS = ("chain", "ring", "star", "mesh", "random")
+
+
+def add_topology_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("topology")
+    group.add_argument("--topology", help="JSON Lines topology written by 'export --format jsonl'")
+    group.add_argument("--areas", type=int, default=3, help="Number of generated areas")
+    group.add_argument("--nodes-per-area", type=int, default=4)
+    group.add_argument("--shape", choices=SHAPES, default="star")
+    group.add_argument("--fabric", choices=FABRICS, default="chain")
+    group.add_argument("--seed", type=int, default=None)
+    group.add_argument(
+        "--layout", choices=("grid", "circle", "none"), default="grid", help="How areas are placed on the canvas"
+    )
+
+
+def add_server_arguments(parser: argparse.ArgumentParser, url: Optional[str] = "http://localhost:3080") -> None:
+    group = parser.add_argument_group("server")
+    group.add_argument("--url", default=url)
+    group.add_argument("--user", default="gns3")
+    group.add_argument("--password", default="gns3")
+    group.add_argument("--project", default="untitled")
+    group.add_argument("--metadata-cache", help="Persist project/compute/template metadata to this file")
+
+
+def load_topology(args: argparse.Namespace) -> GlobalTopology:
+    if args.topology:
+        from topology_stream import read_jsonl
+
+        with open(args.topology) as topology_file:
+            return GlobalTopology.from_records(read_jsonl(topology_file))
+
+    topology = GlobalTopology()
+    areas = []
+    for index in range(args.areas):
+        name = chr(ord("A") + index) if args.areas <= 26 else f"A{index}"
+        if args.shape == "tree":
+            areas.append(topology.build_tree(name, 2, max(1, int(args.nodes_per_area**0.5))))
+        elif args.shape == "fat_tree":
+            areas.append(topology.build_fat_tree(name, max(2, args.nodes_per_area - args.nodes_per_area % 2)))
+        elif args.shape == "random":
+            seed = None if args.seed is None else args.seed + index
+            areas.append(topology.build_random(name, args.nodes_per_area, seed=seed))
+        else:
+            areas.append(getattr(topology, f"build_{args.shape}")(name, args.nodes_per_area))
+    topology.connect_areas(areas, args.fabric, seed=args.seed)
+    return topology
+
+
+def layout_positions(args: argparse.Namespace, topology: GlobalTopology):
+    return None if args.layout == "none" else topology.layout(args.layout)
+
+
+def connect(args: argparse.Namespace):
+    from gns3_connector import GNS3Connector
+    from interface import HyperInterface
+    from metadata_cache import MetadataCache
+
+    metadata_cache = MetadataCache(path=args.metadata_cache) if args.metadata_cache else None
+    connector = GNS3Connector(
+        args.url, args.user, args.password, args.project, fast_parse=True, metadata_cache=metadata_cache
+    )
+    return HyperInterface(connector)
+
+
+def deploy(args: argparse.Namespace) -> int:
+    if args.resume and not args.journal:
+        raise ValueError("--resume needs --journal")
+    if args.wipe and not args.snapshot_cache:
+        raise ValueError("--wipe needs --snapshot-cache")
+    if args.journal and (args.mode not in ("sequential", "parallel") or args.shard or args.snapshot_cache):
+        raise ValueError("--journal only applies to sequential and parallel deploys")
+    if args.mode == "sequential":
+        args.workers = 1
+    if args.plan:
+        return deploy_plan(args)
+    topology = load_topology(args)
+    positions = layout_positions(args, topology)
+    generator = TopologyGenerator()
+    if args.mode == "async":
+        import asyncio
+
+        from async_gns3_connector import AsyncGNS3Connector
+        from async_interface import AsyncHyperInterface
+
+        async def deploy_async():
+            async with await AsyncGNS3Connector.connect(
+                args.url, args.user, args.password, args.project, max_concurrency=args.workers
+            ) as connector:
+                # No connector: deploy_async polls the computes through the async one
+                scheduler = ComputeScheduler(poll_interval=args.poll_interval) if args.spread else None
+                await generator.deploy_async(
+                    AsyncHyperInterface(connector), topology, scheduler, positions, cascade=args.cascade
+                )
+
+        asyncio.run(deploy_async())
+        return 0
+
+    if args.shard:
+        return deploy_sharded(args, topology, generator, positions)
+
+    interface = connect(args)
+    scheduler = ComputeScheduler(interface.connector, poll_interval=args.poll_interval) if args.spread else None
+    if args.mode == "file":
+        generator.deploy_file(interface, topology, args.file_dir, args.file_name, positions)
+    elif args.mode == "reconcile":
+        generator.reconcile(interface, topology, workers=args.workers)
+    elif args.snapshot_cache:
+        from snapshot_cache import SnapshotCache
+
+        cache = SnapshotCache(interface.connector, args.snapshot_cache, args.max_snapshots)
+        generator.deploy_cached(
+            interface,
+            topology,
+            cache,
+            workers=args.workers,
+            metrics_path=args.metrics,
+            scheduler=scheduler,
+            positions=positions,
+            cascade=args.cascade,
+            wipe=args.wipe,
+        )
+    elif args.journal:
+        from deploy_journal import DeployJournal
+
+        with DeployJournal(args.journal, resume=args.resume) as journal:
+            generator.deploy(
+                interface,
+                topology,
+                workers=args.workers,
+                metrics_path=args.metrics,
+                scheduler=scheduler,
+                positions=positions,
+                journal=journal,
+                cascade=args.cascade,
+            )
+            counts = journal.counts()
+        return 1 if counts["failed"] or counts["planned"] or counts["pending"] else 0
+    else:
+        generator.deploy(
+            interface,
+            topology,
+            workers=args.workers,
+            metrics_path=args.metrics,
+            scheduler=scheduler,
+            positions=positions,
+            cascade=args.cascade,
+        )
+    return 0
+
+
+def deploy_plan(args: argparse.Namespace) -> int:
+    from deploy_plan import DeployPlan
+
+    if args.mode not in ("sequential", "parallel", "async"):
+        raise ValueError("--plan runs with the sequential, parallel or async mode")
+    plan = DeployPlan.load(args.plan)
+    generator = TopologyGenerator()
+    if args.mode == "async":
+        import asyncio
+
+        from async_gns3_connector import AsyncGNS3Connector
+        from async_interface import AsyncHyperInterface
+
+        async def deploy_async():
+            async with await AsyncGNS3Connector.connect(
+                args.url, args.user, args.password, args.project, max_concurrency=args.workers
+            ) as connector:
+                await generator.deploy_plan_async(AsyncHyperInterface(connector), plan)
+
+        asyncio.run(deploy_async())
+    else:
+        generator.deploy_plan(connect(args), plan, workers=args.workers, metrics_path=args.metrics)
+    return 0
+
+
+def plan(args: argparse.Namespace) -> int:
+    from capacity import cascade_topology, check_capacity, port_budgets
+    from deploy_plan import DeployPlan
+    from request_metrics import RequestMetrics
+
+    topology = load_topology(args)
+    # Without a server the default port counts stand in for the builtin templates
+    budgets = port_budgets(connect(args).connector.get_templates().templates if args.url else None)
+    if args.cascade:
+        print(f"Cascaded oversubscribed nodes behind {len(cascade_topology(topology, budgets))} switches")
+    report = check_capacity(topology.deploy_nodes(), topology.deploy_links(), budgets)
+    print(report)
+    if not report.is_ok():
+        if not args.cascade:
+            print("Rerun with --cascade to move their area links behind extra switches")
+        return 1
+    compiled = DeployPlan.from_topology(topology, layout_positions(args, topology), budgets)
+    metrics = RequestMetrics.load(args.latencies) if args.latencies else None
+    print("\n".join(compiled.summary(metrics, args.workers)))
+    if args.diff:
+        print(DeployPlan.load(args.diff).diff(compiled))
+    if args.output:
+        compiled.dump(args.output)
+    return 0
+
+
+def deploy_sharded(args: argparse.Namespace, topology: GlobalTopology, generator: TopologyGenerator, positions) -> int:
+    from urllib.parse import urlparse
+
+    from gns3_connector import GNS3Connector
+    from interface import HyperInterface
+    from sharding import ShardMap
+
+    urls = {f"shard{index}": url for index, url in enumerate(args.shard)}
+    generator.plan_capacity(topology, cascade=args.cascade, positions=positions)
+    shard_map = ShardMap.build(topology, {name: urlparse(url).hostname for name, url in urls.items()})
+    if args.shard_map:
+        shard_map.dump(args.shard_map)
+    interfaces = {
+        name: HyperInterface(GNS3Connector(url, args.user, args.password, args.project, fast_parse=True))
+        for name, url in urls.items()
+    }
+    generator.deploy_sharded(shard_map, interfaces, workers=args.workers, positions=positions)
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    topology = load_topology(args)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if args.format == "jsonl":
+            from topology_stream import write_jsonl
+
+            write_jsonl(topology, output)
+        elif args.format == "json":
+            from topology_stream import write_json
+
+            write_json(topology, output)
+            output.write("\n")
+        else:
+            import json
+
+            from gns3_project_file import build_project
+
+            project = build_project(
+                topology.deploy_nodes(),
+                topology.deploy_links(),
+                args.project_name,
+                positions=layout_positions(args, topology),
+            )
+            json.dump(project, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def show(args: argparse.Namespace) -> int:
+    if args.topology and args.layout == "none":
+        from topology_stream import read_jsonl
+
+        with open(args.topology) as topology_file:
+            TopologyGenerator().show_from_stream(read_jsonl(topology_file))
+    else:
+        topology = load_topology(args)
+        TopologyGenerator().show_from_dict(topology.to_json(), layout_positions(args, topology))
+    return 0
+
+
+def render(args: argparse.Namespace) -> int:
+    from render import render_topology
+
+    topology = load_topology(args)
+    layout = "grid" if args.layout == "none" else args.layout
+    start = time.perf_counter()
+    detail = render_topology(topology, args.output, args.detail, args.area, layout, args.max_nodes)
+    print(f"Rendered {detail} view to {args.output} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def teardown(args: argparse.Namespace) -> int:
+    interface = connect(args)
+    prefixes = [f"{area}-" for area in args.area or []] + (args.prefix or []) or [None]
+    for prefix in prefixes:
+        timings = interface.teardown(prefix, workers=args.workers, stop_first=args.stop)
+        TopologyGenerator.print_timings(timings)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ordum", description="Infrastructure generator for GNS3")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    deploy_parser = subparsers.add_parser("deploy", help="Deploy a topology to a GNS3 project")
+    add_topology_arguments(deploy_parser)
+    add_server_arguments(deploy_parser)
+    deploy_parser.add_argument(
+        "--mode", choices=("sequential", "parallel", "async", "file", "reconcile"), default="parallel"
+    )
+    deploy_parser.add_argument("--workers", type=int, default=8)
+    deploy_parser.add_argument("--spread", action="store_true", help="Spread areas across all connected computes")
+    deploy_parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between compute load polls")
+    deploy_parser.add_argument(
+        "--shard", action="append", metavar="URL", help="Split areas across these servers (repeat for each shard)"
+    )
+    deploy_parser.add_argument("--shard-map", help="Write the area/tunnel shard map to this JSON file")
+    deploy_parser.add_argument(
+        "--snapshot-cache",
+        metavar="INDEX",
+        help="Restore identical topologies from snapshots, LRU index in this file. Restoring or deploying replaces "
+        "the whole project, so a project that already holds nodes is refused unless --wipe is given",
+    )
+    deploy_parser.add_argument(
+        "--wipe", action="store_true", help="With --snapshot-cache, delete every node and link already in the project"
+    )
+    deploy_parser.add_argument("--max-snapshots", type=int, default=5, help="Snapshots kept per project")
+    deploy_parser.add_argument(
+        "--cascade", action="store_true", help="Put extra switches behind nodes with more links than ports"
+    )
+    deploy_parser.add_argument(
+        "--plan",
+        help="Run a plan written by 'plan --output' instead of a topology. Refused if some link has no free port "
+        "or if a plan node already exists in the project",
+    )
+    deploy_parser.add_argument("--journal", help="Record every node and link operation in this JSON Lines file")
+    deploy_parser.add_argument(
+        "--resume", action="store_true", help="Skip what the journal records as done, retry the rest"
+    )
+    deploy_parser.add_argument("--metrics", help="Write request metrics (.prom for Prometheus text, JSON otherwise)")
+    deploy_parser.add_argument("--file-dir", default=".", help="Directory readable by the GNS3 server (file mode)")
+    deploy_parser.add_argument("--file-name", default="ordum", help="Project name (file mode)")
+    deploy_parser.set_defaults(handler=deploy)
+
+    plan_parser = subparsers.add_parser(
+        "plan", help="Dry run: compile the deploy into operations and estimate its cost, without deploying anything"
+    )
+    add_topology_arguments(plan_parser)
+    add_server_arguments(plan_parser, url=None)
+    plan_parser.add_argument("--workers", type=int, default=8, help="Workers the estimate assumes")
+    plan_parser.add_argument(
+        "--latencies", metavar="METRICS", help="JSON written by 'deploy --metrics', for per-endpoint latencies"
+    )
+    plan_parser.add_argument(
+        "--cascade", action="store_true", help="Put extra switches behind nodes with more links than ports"
+    )
+    plan_parser.add_argument("--output", help="Write the plan to this JSON file")
+    plan_parser.add_argument("--diff", metavar="PLAN", help="Show what changed since this earlier plan")
+    plan_parser.set_defaults(handler=plan)
+
+    export_parser = subparsers.add_parser("export", help="Export a topology without contacting a server")
+    add_topology_arguments(export_parser)
+    export_parser.add_argument("--format", choices=("jsonl", "json", "gns3"), default="jsonl")
+    export_parser.add_argument("--output", help="Output file, stdout by default")
+    export_parser.add_argument("--project-name", default="ordum", help="Project name (gns3 format)")
+    export_parser.set_defaults(handler=export)
+
+    show_parser = subparsers.add_parser("show", help="Plot a topology")
+    add_topology_arguments(show_parser)
+    show_parser.set_defaults(handler=show)
+
+    render_parser = subparsers.add_parser("render", help="Render a topology to a PNG/SVG file without a display")
+    add_topology_arguments(render_parser)
+    render_parser.add_argument("--output", default="topology.png", help="Image path, format taken from the extension")
+    render_parser.add_argument("--detail", choices=("auto", "full", "aggregate"), default="auto")
+    render_parser.add_argument("--area", help="Only draw this area and the links leaving it")
+    render_parser.add_argument(
+        "--max-nodes", type=int, default=2000, help="Above this many nodes, auto detail draws one node per area"
+    )
+    render_parser.set_defaults(handler=render)
+
+    teardown_parser = subparsers.add_parser("teardown", help="Delete the links and nodes of a project")
+    add_server_arguments(teardown_parser)
+    teardown_parser.add_argument("--area", action="append", help="Only delete the nodes of this area (repeatable)")
+    teardown_parser.add_argument("--prefix", action="append", help="Only delete nodes whose name starts with this")
+    teardown_parser.add_argument("--workers", type=int, default=8, help="Concurrent delete requests")
+    teardown_parser.add_argument("--stop", action="store_true", help="Stop running nodes before deleting them")
+    teardown_parser.set_defaults(handler=teardown)
+    return parser
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(run())
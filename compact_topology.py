@@ -0,0 +1,133 @@
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+
+class CompactTopology:
+    KINDS = ("vpcs", "switch", "router")
+
+    def __init__(self) -> None:
+        self.area_names: List[str] = []
+        self.area_ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.name_ids: Dict[str, int] = {}
+        self.node_area = array("i")
+        self.node_kind = array("b")
+        self.edge_source = array("i")
+        self.edge_target = array("i")
+        self.area_link_source = array("i")
+        self.area_link_target = array("i")
+        self.area_link_medium = array("i")
+        # (indptr, indices), rebuilt on the next lookup after any change
+        self._csr = None
+
+    @classmethod
+    def from_topology(cls, topology) -> "CompactTopology":
+        compact = cls()
+        for area in topology.areas:
+            area_id = compact.add_area(area.name)
+            for node in area.nodes:
+                compact.add_node(node.name, node.kind, area_id)
+            compact.add_node(area.central_node.name, "switch", area_id)
+        for area in topology.areas:
+            for link in area.links:
+                compact.add_edge(compact.name_ids[link.source.name], compact.name_ids[link.target.name])
+        for link in topology.links:
+            medium = -1
+            if link.medium_node:
+                medium = compact.add_node(link.medium_node.name, "router", compact.area_ids[link.source_area.name])
+            compact.add_area_link(
+                compact.name_ids[link.source_node.name], compact.name_ids[link.target_node.name], medium
+            )
+        return compact
+
+    def add_area(self, name: str) -> int:
+        if name in self.area_ids:
+            raise ValueError(f"Area {name} already exists")
+        area_id = len(self.area_names)
+        self.area_names.append(sys.intern(name))
+        self.area_ids[name] = area_id
+        return area_id
+
+    def add_node(self, name: str, kind: str, area_id: int) -> int:
+        if name in self.name_ids:
+            raise ValueError(f"Node {name} already exists")
+        node_id = len(self.names)
+        name = sys.intern(name)
+        self.names.append(name)
+        self.name_ids[name] = node_id
+        self.node_area.append(area_id)
+        self.node_kind.append(self.KINDS.index(kind))
+        self._csr = None
+        return node_id
+
+    def add_edge(self, source: int, target: int) -> None:
+        self.edge_source.append(source)
+        self.edge_target.append(target)
+        self._csr = None
+
+    def add_area_link(self, source: int, target: int, medium: int = -1) -> None:
+        self.area_link_source.append(source)
+        self.area_link_target.append(target)
+        self.area_link_medium.append(medium)
+        self._csr = None
+
+    def node_count(self) -> int:
+        return len(self.names)
+
+    def link_count(self) -> int:
+        medium_links = sum(1 for medium in self.area_link_medium if medium >= 0)
+        return len(self.edge_source) + len(self.area_link_source) + medium_links
+
+    def deploy_nodes(self) -> List[Tuple[str, str, str]]:
+        return [
+            (name, self.KINDS[self.node_kind[node_id]], self.area_names[self.node_area[node_id]])
+            for node_id, name in enumerate(self.names)
+        ]
+
+    def deploy_links(self) -> List[Tuple[str, str]]:
+        names = self.names
+        links = [(names[source], names[target]) for source, target in zip(self.edge_source, self.edge_target)]
+        for source, target, medium in zip(self.area_link_source, self.area_link_target, self.area_link_medium):
+            if medium >= 0:
+                links.append((names[source], names[medium]))
+                links.append((names[medium], names[target]))
+            else:
+                links.append((names[source], names[target]))
+        return links
+
+    def csr(self):
+        if self._csr is None:
+            self._csr = self._build_csr()
+        return self._csr
+
+    def _build_csr(self):
+        import numpy as np
+
+        sources, targets = [], []
+        for source, target in self.deploy_links():
+            sources.append(self.name_ids[source])
+            targets.append(self.name_ids[target])
+        rows = np.concatenate([np.asarray(sources, dtype=np.int32), np.asarray(targets, dtype=np.int32)])
+        columns = np.concatenate([np.asarray(targets, dtype=np.int32), np.asarray(sources, dtype=np.int32)])
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(self.node_count() + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.node_count()), out=indptr[1:])
+        return indptr, columns[order]
+
+    def neighbors(self, name: str) -> List[str]:
+        indptr, indices = self.csr()
+        node_id = self.name_ids[name]
+        return [self.names[neighbor] for neighbor in indices[indptr[node_id] : indptr[node_id + 1]]]
+
+    def nbytes(self) -> int:
+        arrays = (
+            self.node_area,
+            self.node_kind,
+            self.edge_source,
+            self.edge_target,
+            self.area_link_source,
+            self.area_link_target,
+            self.area_link_medium,
+        )
+        return sum(values.itemsize * len(values) for values in arrays)
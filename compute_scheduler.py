@@ -0,0 +1,95 @@
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from data_structure.computes import ComputeOutput
+
+
+class ComputeScheduler:
+    # Nodes of one area go to the same compute so intra-area links stay local.
+    # A new area goes to the least loaded connected compute, where load is the
+    # last polled cpu/memory usage plus the nodes placed on it since that poll.
+    def __init__(
+        self,
+        connector=None,
+        poll_interval: float = 5.0,
+        node_weight: float = 1.0,
+        max_nodes: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.connector = connector
+        self.poll_interval = poll_interval
+        self.node_weight = node_weight
+        self.max_nodes: Dict[str, int] = dict(max_nodes or {})
+        self.computes: Dict[str, ComputeOutput] = {}
+        self.area_computes: Dict[str, str] = {}
+        self.placement: Dict[str, str] = {}
+        self.node_counts: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._last_poll: Optional[float] = None
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+
+    def needs_refresh(self) -> bool:
+        return self._last_poll is None or time.monotonic() - self._last_poll >= self.poll_interval
+
+    def update(self, computes: Iterable[ComputeOutput]) -> None:
+        with self._lock:
+            self.computes = {compute.compute_id: compute for compute in computes if compute.connected}
+            self._pending = {compute_id: 0 for compute_id in self.computes}
+            self._last_poll = time.monotonic()
+
+    def refresh(self) -> None:
+        if self.connector is None:
+            raise ValueError("ComputeScheduler has no connector to poll, call update() instead")
+        if self.connector.metadata_cache:
+            self.connector.metadata_cache.invalidate(group="computes")
+        self.update(self.connector.get_computes().computes)
+
+    def load(self, compute_id: str) -> float:
+        compute = self.computes[compute_id]
+        usage = max(compute.cpu_usage_percent or 0.0, compute.memory_usage_percent or 0.0)
+        return usage + self._pending.get(compute_id, 0) * self.node_weight
+
+    def _has_room(self, compute_id: str) -> bool:
+        limit = self.max_nodes.get(compute_id)
+        return limit is None or self.node_counts.get(compute_id, 0) < limit
+
+    def _least_loaded(self) -> str:
+        candidates = [compute_id for compute_id in self.computes if self._has_room(compute_id)]
+        if not candidates:
+            raise ValueError("No connected compute has room left for another node")
+        return min(candidates, key=self.load)
+
+    def place(self, name: str, area: Optional[str] = None) -> str:
+        if self.connector is not None and self.needs_refresh():
+            # Workers placing nodes at the same time poll once between them
+            with self._refresh_lock:
+                if self.needs_refresh():
+                    self.refresh()
+        with self._lock:
+            if name in self.placement:
+                return self.placement[name]
+            if not self.computes:
+                raise ValueError("No connected compute available")
+            compute_id = self.area_computes.get(area) if area is not None else None
+            if compute_id not in self.computes or not self._has_room(compute_id):
+                compute_id = self._least_loaded()
+                if area is not None:
+                    self.area_computes[area] = compute_id
+            self.placement[name] = compute_id
+            self.node_counts[compute_id] = self.node_counts.get(compute_id, 0) + 1
+            self._pending[compute_id] = self._pending.get(compute_id, 0) + 1
+            return compute_id
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            compute_id = self.placement.pop(name, None)
+            if compute_id is not None:
+                self.node_counts[compute_id] -= 1
+
+    def summary(self) -> List[str]:
+        lines = []
+        for compute_id, count in sorted(self.node_counts.items()):
+            areas = sorted(area for area, area_compute in self.area_computes.items() if area_compute == compute_id)
+            lines.append(f"{compute_id}: {count} nodes, areas {', '.join(areas)}")
+        return lines
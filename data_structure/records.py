@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Record:
+    __slots__ = ()
+    nested: Dict[str, type] = {}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> "Record":
+        fields = fields or cls.__slots__
+        record = cls.__new__(cls)
+        get = data.get
+        for name in fields:
+            setattr(record, name, get(name))
+        for name, nested in cls.nested.items():
+            value = get(name) if name in fields else None
+            if value is None:
+                continue
+            if isinstance(value, list):
+                setattr(record, name, [nested.from_json(item) for item in value])
+            else:
+                setattr(record, name, nested.from_json(value))
+        return record
+
+    @classmethod
+    def from_json_list(cls, data: List[Dict[str, Any]], fields: Optional[Iterable[str]] = None) -> List["Record"]:
+        fields = tuple(fields) if fields else cls.__slots__
+        return [cls.from_json(item, fields) for item in data]
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {}
+        for name in self.__slots__:
+            if not hasattr(self, name):
+                continue
+            value = getattr(self, name)
+            if isinstance(value, Record):
+                value = value.to_json()
+            elif isinstance(value, list) and value and isinstance(value[0], Record):
+                value = [item.to_json() for item in value]
+            data[name] = value
+        return data
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if hasattr(self, name))
+        return f"{type(self).__name__}({fields})"
+
+
+class LabelRecord(Record):
+    __slots__ = ("rotation", "style", "text", "x", "y")
+
+
+class PortRecord(Record):
+    __slots__ = ("adapter_number", "data_link_types", "link_type", "name", "port_number", "short_name")
+
+
+class NodeRecord(Record):
+    __slots__ = (
+        "command_line",
+        "compute_id",
+        "console",
+        "console_auto_start",
+        "console_host",
+        "console_type",
+        "custom_adapters",
+        "first_port_name",
+        "height",
+        "label",
+        "locked",
+        "name",
+        "node_directory",
+        "node_id",
+        "node_type",
+        "port_name_format",
+        "port_segment_size",
+        "ports",
+        "project_id",
+        "properties",
+        "status",
+        "symbol",
+        "template_id",
+        "width",
+        "x",
+        "y",
+        "z",
+    )
+    nested = {"label": LabelRecord, "ports": PortRecord}
+
+
+class LinkNodeRecord(Record):
+    __slots__ = ("node_id", "adapter_number", "port_number")
+
+    def model_dump(self) -> Dict[str, Any]:
+        return self.to_json()
+
+
+class LinkRecord(Record):
+    __slots__ = ("link_id", "project_id", "nodes")
+    nested = {"nodes": LinkNodeRecord}
+
+
+PORT_FIELDS = ("name", "node_id", "node_type", "ports")
+TEARDOWN_FIELDS = ("name", "node_id", "status")
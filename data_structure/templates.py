@@ -12,6 +12,7 @@ class Template(BaseModel):
     template_type: str
     builtin: bool
     image_type: Optional[str] = None
+    ports_mapping: Optional[List[dict]] = None
 
 
 class TemplatesResponse(BaseModel):
@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+PLANNED = "planned"
+DONE = "done"
+FAILED = "failed"
+SUMMARY_LIMIT = 20
+TAIL_CHUNK = 64 * 1024
+
+Operation = Tuple[str, ...]
+
+
+def node_operation(name: str) -> Operation:
+    return ("node", name)
+
+
+def link_operation(source: str, target: str) -> Operation:
+    return ("link", source, target)
+
+
+def record_operation(record: Dict) -> Operation:
+    if record["op"] == "node":
+        return node_operation(record["name"])
+    return link_operation(record["source"], record["target"])
+
+
+def journaled(journal: Optional["DeployJournal"], operation: Operation, function: Callable, *args) -> Any:
+    if journal is None:
+        return function(*args)
+    return journal.run(operation, function, *args)
+
+
+class DeployJournal:
+    # Append-only JSON Lines: one "begin" record per run, then planned/done/failed records
+    # per node and link. A run started without resume starts over; a resumed run picks up
+    # the state left by the runs before it.
+    def __init__(self, path: str, resume: bool = False, fsync: bool = False) -> None:
+        self.path = path
+        self.resume = resume
+        self.fsync = fsync
+        self.topology: Optional[str] = None
+        self.entries: Dict[Operation, Dict] = {}
+        self.expected: List[Operation] = []
+        self._lock = Lock()
+        if resume:
+            self.load()
+        self._drop_torn_tail()
+        self._file = open(path, "a")
+
+    def load(self) -> None:
+        if not os.path.isfile(self.path):
+            print(f"Warning: no journal at {self.path}, starting a fresh deploy")
+            return
+        with open(self.path) as journal_file:
+            for line_number, line in enumerate(journal_file, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Most likely the last line, cut short when the process died
+                    print(f"Warning: skipping unreadable journal line {line_number}")
+                    continue
+                if record["op"] == "begin":
+                    if not record.get("resume"):
+                        self.entries.clear()
+                    self.topology = record["topology"]
+                else:
+                    self.entries[record_operation(record)] = record
+
+    def _drop_torn_tail(self) -> None:
+        # A line cut short by a crash would glue the next record onto it and lose both,
+        # so cut the file back to its last complete line before appending
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "rb+") as journal_file:
+            end = journal_file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - TAIL_CHUNK)
+                journal_file.seek(start)
+                newline = journal_file.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                print(f"Warning: dropping the unfinished last line of journal {self.path}")
+                journal_file.truncate(position)
+
+    def _write(self, record: Dict) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if record["op"] != "begin":
+                self.entries[record_operation(record)] = record
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def begin(self, topology: str, nodes: Iterable[Tuple[str, str, str]], links: Iterable[Tuple[str, str]]) -> None:
+        if self.resume and self.topology not in (None, topology):
+            raise ValueError(f"Journal {self.path} was written for another topology, deploy without --resume")
+        self.topology = topology
+        self.expected = [node_operation(name) for name, _, _ in nodes] + [link_operation(*link) for link in links]
+        self._write({"op": "begin", "topology": topology, "resume": self.resume, "time": time.time()})
+
+    def status(self, operation: Operation) -> Optional[str]:
+        entry = self.entries.get(operation)
+        return entry["status"] if entry else None
+
+    def adopt(self, nodes: Dict[str, str], links: Dict[Tuple[str, str], str]) -> int:
+        # A request that was sent but not confirmed may still have reached the server
+        # before the crash; take over what the project already holds instead of creating
+        # it twice. links is keyed by the sorted pair of node names.
+        adopted = 0
+        for operation in self.expected:
+            if self.status(operation) == DONE:
+                continue
+            if operation[0] == "node" and operation[1] in nodes:
+                self._done(operation, nodes[operation[1]])
+                adopted += 1
+            elif operation[0] == "link" and tuple(sorted(operation[1:])) in links:
+                self._done(operation, links[tuple(sorted(operation[1:]))])
+                adopted += 1
+        return adopted
+
+    def remaining(
+        self, nodes: List[Tuple[str, str, str]], links: List[Tuple[str, str]]
+    ) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+        return (
+            [node for node in nodes if self.status(node_operation(node[0])) != DONE],
+            [link for link in links if self.status(link_operation(*link)) != DONE],
+        )
+
+    def _record(self, operation: Operation, status: str, **fields) -> None:
+        if operation[0] == "node":
+            record = {"op": "node", "name": operation[1], "status": status}
+        else:
+            record = {"op": "link", "source": operation[1], "target": operation[2], "status": status}
+        record.update(fields)
+        self._write(record)
+
+    def _done(self, operation: Operation, object_id: Optional[str]) -> None:
+        self._record(operation, DONE, **{"node_id" if operation[0] == "node" else "link_id": object_id})
+
+    def run(self, operation: Operation, function: Callable, *args) -> Any:
+        self._record(operation, PLANNED)
+        try:
+            result = function(*args)
+        except Exception as e:
+            self._record(operation, FAILED, error=str(e) or type(e).__name__)
+            raise
+        self._done(operation, getattr(result, "node_id" if operation[0] == "node" else "link_id", None))
+        return result
+
+    def failures(self) -> Dict[Operation, str]:
+        return {
+            operation: self.entries[operation].get("error", "")
+            for operation in self.expected
+            if self.status(operation) == FAILED
+        }
+
+    def counts(self) -> Dict[str, int]:
+        counts = {DONE: 0, FAILED: 0, PLANNED: 0, "pending": 0}
+        for operation in self.expected:
+            counts[self.status(operation) or "pending"] += 1
+        return counts
+
+    def summary(self) -> List[str]:
+        counts = self.counts()
+        lines = [
+            f"Journal {self.path}: {counts[DONE]} done, {counts[FAILED]} failed, "
+            f"{counts[PLANNED] + counts['pending']} pending"
+        ]
+        failures = self.failures()
+        for operation, error in list(failures.items())[:SUMMARY_LIMIT]:
+            lines.append(f"  {operation[0]} {'-'.join(operation[1:])}: {error}")
+        if len(failures) > SUMMARY_LIMIT:
+            lines.append(f"  ... and {len(failures) - SUMMARY_LIMIT} more")
+        if counts[FAILED] or counts[PLANNED] or counts["pending"]:
+            lines.append("Run the same deploy with --resume to retry them")
+        return lines
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "DeployJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
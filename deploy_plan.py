@@ -0,0 +1,426 @@
+import asyncio
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from data_structure.links import LinkNode
+from port_allocator import PortAllocator
+from request_metrics import RequestMetrics
+
+PLAN_VERSION = 1
+CREATE_NODE = "create_node"
+RESERVE_PORT = "reserve_port"
+CREATE_LINK = "create_link"
+
+# Ports a freshly created node has when no ports_mapping is sent with it
+DEFAULT_PORT_COUNTS: Dict[str, int] = {"vpcs": 1, "switch": 8, "router": 8}
+# Operations that go to the server; reserve_port is resolved locally
+OPERATION_ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    CREATE_NODE: ("POST", "/v2/projects/{project_id}/nodes"),
+    CREATE_LINK: ("POST", "/v2/projects/{project_id}/links"),
+}
+DEFAULT_LATENCY = 0.02
+# Names listed in a refusal before it is cut short
+REPORT_LIMIT = 20
+
+
+class PlanOperation:
+    __slots__ = ("op_id", "action", "args", "depends")
+
+    def __init__(self, op_id: str, action: str, args: Dict, depends: Tuple[str, ...] = ()):
+        self.op_id = op_id
+        self.action = action
+        self.args = args
+        self.depends = depends
+
+    def to_json(self) -> Dict:
+        return {"id": self.op_id, "action": self.action, "args": self.args, "depends": list(self.depends)}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "PlanOperation":
+        return cls(data["id"], data["action"], data["args"], tuple(data["depends"]))
+
+    def __eq__(self, other):
+        return isinstance(other, PlanOperation) and self.to_json() == other.to_json()
+
+    def __repr__(self):
+        return f"PlanOperation({self.op_id})"
+
+
+class PlanDiff:
+    def __init__(self, added: List[str], removed: List[str], changed: List[str]) -> None:
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def __str__(self):
+        lines = [f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)} operations"]
+        lines.extend(f"+ {op_id}" for op_id in self.added)
+        lines.extend(f"- {op_id}" for op_id in self.removed)
+        lines.extend(f"~ {op_id}" for op_id in self.changed)
+        return "\n".join(lines)
+
+
+class DeployPlan:
+    # Operation DAG for deploying a topology into an empty project. Operation ids come
+    # from node names, so two plans of similar topologies diff operation by operation.
+    # Port numbers are assigned at compile time from the ports a new node is known to
+    # have; links that find no free port are listed in unplaceable instead, and such a
+    # plan is refused at deploy time (see check_target).
+    def __init__(self, operations: Optional[List[PlanOperation]] = None) -> None:
+        self.operations: Dict[str, PlanOperation] = {}
+        self.unplaceable: List[Tuple[str, str]] = []
+        for operation in operations or []:
+            self.add(operation)
+
+    def add(self, operation: PlanOperation) -> None:
+        missing = [op_id for op_id in operation.depends if op_id not in self.operations]
+        if missing:
+            raise ValueError(f"Operation {operation.op_id} depends on unknown operations {', '.join(missing)}")
+        if operation.op_id in self.operations:
+            raise ValueError(f"Duplicate operation {operation.op_id}")
+        self.operations[operation.op_id] = operation
+
+    @classmethod
+    def compile(
+        cls,
+        nodes: Iterable[Tuple[str, str, str]],
+        links: Iterable[Tuple[str, str]],
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        port_counts: Optional[Dict[str, int]] = None,
+    ) -> "DeployPlan":
+        positions = positions or {}
+        port_counts = {**DEFAULT_PORT_COUNTS, **(port_counts or {})}
+        plan = cls()
+        allocator = PortAllocator()
+        for name, kind, area in nodes:
+            args = {"name": name, "kind": kind, "area": area}
+            if name in positions:
+                args["position"] = list(positions[name])
+            plan.add(PlanOperation(node_operation_id(name), CREATE_NODE, args))
+            # Node names stand in for node ids until the nodes exist
+            allocator.register(name, name, [(0, port_number) for port_number in range(port_counts[kind])])
+
+        for source, target in links:
+            link_id = f"{source}|{target}"
+            ports: List[LinkNode] = []
+            try:
+                ports.append(allocator.reserve(source))
+                ports.append(allocator.reserve(target))
+            except ValueError:
+                for port in ports:
+                    allocator.release(port)
+                plan.unplaceable.append((source, target))
+                continue
+            reservations = []
+            for node_name, port in zip((source, target), ports):
+                op_id = f"port:{link_id}:{node_name}"
+                args = {"node": node_name, "adapter_number": port.adapter_number, "port_number": port.port_number}
+                plan.add(PlanOperation(op_id, RESERVE_PORT, args, (node_operation_id(node_name),)))
+                reservations.append(op_id)
+            link_args = {"source": source, "target": target}
+            plan.add(PlanOperation(f"link:{link_id}", CREATE_LINK, link_args, tuple(reservations)))
+        return plan
+
+    @classmethod
+    def from_topology(
+        cls,
+        topology,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        port_counts: Optional[Dict[str, int]] = None,
+    ) -> "DeployPlan":
+        return cls.compile(topology.deploy_nodes(), topology.deploy_links(), positions, port_counts)
+
+    def __len__(self):
+        return len(self.operations)
+
+    def node_names(self) -> List[str]:
+        return [operation.args["name"] for operation in self.operations.values() if operation.action == CREATE_NODE]
+
+    def check_target(self, project_node_names: Iterable[str]) -> None:
+        # Ports are numbered from scratch for nodes the plan creates itself, so it only runs
+        # when every link got a port and none of its nodes already exist in the project
+        if self.unplaceable:
+            links = ", ".join(f"{source}-{target}" for source, target in self.unplaceable[:REPORT_LIMIT])
+            raise ValueError(
+                f"Plan has {len(self.unplaceable)} links with no free port ({links}), "
+                "compile it again with --cascade"
+            )
+        existing = sorted(set(self.node_names()) & set(project_node_names))
+        if existing:
+            raise ValueError(
+                f"{len(existing)} plan nodes already exist in the project ({', '.join(existing[:REPORT_LIMIT])}), "
+                "deploy the plan into an empty project or use --mode reconcile"
+            )
+
+    def counts(self) -> Dict[str, int]:
+        counts = {CREATE_NODE: 0, RESERVE_PORT: 0, CREATE_LINK: 0}
+        for operation in self.operations.values():
+            counts[operation.action] += 1
+        return counts
+
+    def request_count(self) -> int:
+        return sum(1 for operation in self.operations.values() if operation.action in OPERATION_ENDPOINTS)
+
+    def dependents(self) -> Dict[str, List[str]]:
+        dependents: Dict[str, List[str]] = {op_id: [] for op_id in self.operations}
+        for operation in self.operations.values():
+            for op_id in operation.depends:
+                dependents[op_id].append(operation.op_id)
+        return dependents
+
+    def estimate(
+        self, metrics: Optional[RequestMetrics] = None, workers: int = 1, default_latency: float = DEFAULT_LATENCY
+    ) -> Dict[str, float]:
+        # Wall time is bounded by the request volume spread over the workers and by the
+        # slowest dependency chain; operations are stored in dependency order.
+        latencies = {
+            action: metrics.mean_latency(method, template, default_latency) if metrics else default_latency
+            for action, (method, template) in OPERATION_ENDPOINTS.items()
+        }
+        finish: Dict[str, float] = {}
+        serial = 0.0
+        for operation in self.operations.values():
+            latency = latencies.get(operation.action, 0.0)
+            serial += latency
+            finish[operation.op_id] = max((finish[op_id] for op_id in operation.depends), default=0.0) + latency
+        critical_path = max(finish.values(), default=0.0)
+        return {
+            "node_latency": latencies[CREATE_NODE],
+            "link_latency": latencies[CREATE_LINK],
+            "serial": serial,
+            "critical_path": critical_path,
+            "estimate": max(serial / max(1, workers), critical_path),
+        }
+
+    def summary(self, metrics: Optional[RequestMetrics] = None, workers: int = 1) -> List[str]:
+        counts = self.counts()
+        estimate = self.estimate(metrics, workers)
+        lines = [
+            f"{len(self)} operations: {counts[CREATE_NODE]} nodes, {counts[RESERVE_PORT]} port reservations, "
+            f"{counts[CREATE_LINK]} links",
+            f"{self.request_count()} HTTP requests "
+            f"({estimate['node_latency'] * 1000:.1f}ms per node, {estimate['link_latency'] * 1000:.1f}ms per link)",
+            f"estimated wall time with {workers} workers: {estimate['estimate']:.2f}s "
+            f"(serial {estimate['serial']:.2f}s, critical path {estimate['critical_path']:.2f}s)",
+        ]
+        if self.unplaceable:
+            lines.append(f"Warning: {len(self.unplaceable)} links have no free port on one of their nodes")
+        return lines
+
+    def diff(self, other: "DeployPlan") -> PlanDiff:
+        # What changes going from this plan to other
+        return PlanDiff(
+            [op_id for op_id in other.operations if op_id not in self.operations],
+            [op_id for op_id in self.operations if op_id not in other.operations],
+            [
+                op_id
+                for op_id, operation in other.operations.items()
+                if op_id in self.operations and self.operations[op_id] != operation
+            ],
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "version": PLAN_VERSION,
+            "operations": [operation.to_json() for operation in self.operations.values()],
+            "unplaceable": [list(link) for link in self.unplaceable],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "DeployPlan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version {data.get('version')}, expected {PLAN_VERSION}")
+        plan = cls([PlanOperation.from_json(operation) for operation in data["operations"]])
+        plan.unplaceable = [tuple(link) for link in data.get("unplaceable", [])]
+        return plan
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as plan_file:
+            json.dump(self.to_json(), plan_file, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "DeployPlan":
+        with open(path) as plan_file:
+            return cls.from_json(json.load(plan_file))
+
+
+def node_operation_id(name: str) -> str:
+    return f"node:{name}"
+
+
+class PlanExecutor:
+    # Runs a plan through a HyperInterface. An operation whose dependency failed is
+    # skipped, everything else still runs.
+    def __init__(self, interface) -> None:
+        self.interface = interface
+        self.node_ids: Dict[str, str] = {}
+        self.ports: Dict[str, LinkNode] = {}
+        self.failed: Dict[str, str] = {}
+        self.skipped: Set[str] = set()
+        self._phase_ends: Dict[str, float] = {}
+
+    def _reserve(self, operation: PlanOperation) -> None:
+        args = operation.args
+        self.ports[operation.op_id] = LinkNode(
+            node_id=self.node_ids[args["node"]], adapter_number=args["adapter_number"], port_number=args["port_number"]
+        )
+
+    def _link_ports(self, operation: PlanOperation) -> Tuple[LinkNode, LinkNode]:
+        first, second = operation.depends
+        return self.ports[first], self.ports[second]
+
+    @staticmethod
+    def _check_link(operation: PlanOperation, link) -> None:
+        if isinstance(link, dict):
+            args = operation.args
+            raise ValueError(f"Link {args['source']}-{args['target']} refused: {link.get('message')}")
+
+    def _finished(self, operation: PlanOperation) -> None:
+        phase = "nodes" if operation.action == CREATE_NODE else "links"
+        self._phase_ends[phase] = time.perf_counter()
+
+    def _failed(self, operation: PlanOperation, error: Exception, dependents: Dict[str, List[str]]) -> None:
+        self.failed[operation.op_id] = str(error) or type(error).__name__
+        pending = list(dependents[operation.op_id])
+        while pending:
+            op_id = pending.pop()
+            if op_id not in self.skipped:
+                self.skipped.add(op_id)
+                pending.extend(dependents[op_id])
+
+    def _timings(self, start: float) -> Dict[str, float]:
+        end = time.perf_counter()
+        # The plan numbers ports from scratch; drop the interface's view of them
+        self.interface.port_allocator = None
+        return {
+            "nodes": self._phase_ends.get("nodes", start) - start,
+            "links": self._phase_ends.get("links", start) - start,
+            "total": end - start,
+        }
+
+    def report(self) -> List[str]:
+        lines = [f"{len(self.failed)} operations failed, {len(self.skipped)} skipped"]
+        lines.extend(f"  {op_id}: {error}" for op_id, error in self.failed.items())
+        return lines
+
+    def _run_operation(self, operation: PlanOperation) -> None:
+        if operation.action == CREATE_NODE:
+            args = operation.args
+            position = tuple(args["position"]) if "position" in args else None
+            node = self.interface.create(args["kind"], args["name"], args.get("compute_id"), position)
+            self.node_ids[args["name"]] = node.node_id
+        elif operation.action == RESERVE_PORT:
+            self._reserve(operation)
+        else:
+            link = self.interface.connector.create_link_from_ports(*self._link_ports(operation))
+            self._check_link(operation, link)
+        self._finished(operation)
+
+
+class SequentialExecutor(PlanExecutor):
+    def run(self, plan: DeployPlan) -> Dict[str, float]:
+        dependents = plan.dependents()
+        start = time.perf_counter()
+        for operation in plan.operations.values():
+            if operation.op_id in self.skipped:
+                continue
+            try:
+                self._run_operation(operation)
+            except Exception as e:
+                self._failed(operation, e, dependents)
+        return self._timings(start)
+
+
+class ThreadedExecutor(PlanExecutor):
+    def __init__(self, interface, workers: int = 8) -> None:
+        super().__init__(interface)
+        self.workers = workers
+
+    def run(self, plan: DeployPlan) -> Dict[str, float]:
+        dependents = plan.dependents()
+        waiting = {op_id: len(operation.depends) for op_id, operation in plan.operations.items()}
+        ready = [op_id for op_id, count in waiting.items() if count == 0]
+        self.interface.connector.set_pool_size(self.workers)
+        futures: Dict[Future, str] = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while ready or futures:
+                while ready:
+                    operation = plan.operations[ready.pop()]
+                    if operation.action == RESERVE_PORT:
+                        # Local bookkeeping, not worth a thread hop
+                        done = self._try(operation, dependents)
+                        ready.extend(self._release(operation, dependents, waiting) if done else ())
+                    else:
+                        futures[executor.submit(self._run_operation, operation)] = operation.op_id
+                if not futures:
+                    break
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    operation = plan.operations[futures.pop(future)]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self._failed(operation, e, dependents)
+                        continue
+                    ready.extend(self._release(operation, dependents, waiting))
+        return self._timings(start)
+
+    def _try(self, operation: PlanOperation, dependents: Dict[str, List[str]]) -> bool:
+        try:
+            self._run_operation(operation)
+        except Exception as e:
+            self._failed(operation, e, dependents)
+            return False
+        return True
+
+    @staticmethod
+    def _release(operation: PlanOperation, dependents: Dict[str, List[str]], waiting: Dict[str, int]) -> List[str]:
+        ready = []
+        for op_id in dependents[operation.op_id]:
+            waiting[op_id] -= 1
+            if waiting[op_id] == 0:
+                ready.append(op_id)
+        return ready
+
+
+class AsyncExecutor(PlanExecutor):
+    # Takes an AsyncHyperInterface; concurrency is bounded by its connector
+    async def run(self, plan: DeployPlan) -> Dict[str, float]:
+        dependents = plan.dependents()
+        tasks: Dict[str, asyncio.Future] = {}
+        start = time.perf_counter()
+
+        async def run_operation(operation: PlanOperation) -> bool:
+            results = await asyncio.gather(*(tasks[op_id] for op_id in operation.depends))
+            if not all(results):
+                return False
+            try:
+                await self._run_async(operation)
+            except Exception as e:
+                self._failed(operation, e, dependents)
+                return False
+            return True
+
+        for op_id, operation in plan.operations.items():
+            tasks[op_id] = asyncio.ensure_future(run_operation(operation))
+        await asyncio.gather(*tasks.values())
+        return self._timings(start)
+
+    async def _run_async(self, operation: PlanOperation) -> None:
+        if operation.action == CREATE_NODE:
+            args = operation.args
+            position = tuple(args["position"]) if "position" in args else None
+            node = await self.interface.create(args["kind"], args["name"], args.get("compute_id"), position)
+            self.node_ids[args["name"]] = node.node_id
+        elif operation.action == RESERVE_PORT:
+            self._reserve(operation)
+        else:
+            link = await self.interface.connector.create_link_from_ports(*self._link_ports(operation))
+            self._check_link(operation, link)
+        self._finished(operation)
@@ -1,14 +1,20 @@
-from pprint import pprint
-from sqlite3 import connect
-from typing import Dict, List, Optional
-from numpy import full
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from data_structure.computes import ComputeInput, ComputeOutput, ComputesResponse
 from data_structure.links import LinkNode, LinkRequest, LinkResponse, LinksResponse
 from data_structure.nodes import Node, NodesResponse, Port
 from data_structure.projects import LoadProjectResponse, Project, ProjectsResponse
+from data_structure.records import LinkRecord, NodeRecord
 from data_structure.templates import Template, TemplatesResponse
+from metadata_cache import MetadataCache
+from notification_stream import NotificationListener
+from project_state import ProjectState
+from request_metrics import RequestMetrics
 
 
 class GNS3Connector:
@@ -16,32 +22,80 @@ class GNS3Connector:
     vpcs_symbol_path = ":/symbols/vpcs_guest.svg"
     ethernet_switch_symbol_path = ":/symbols/ethernet_switch.svg"
     router_symbol_path: str = ":/symbols/classic/router.svg"
-
-    def __init__(self, url, username, password, project_name="untitled"):
+    cloud_symbol_path = ":/symbols/cloud.svg"
+
+    def __init__(
+        self,
+        url,
+        username,
+        password,
+        project_name="untitled",
+        use_cache: bool = False,
+        fast_parse: bool = False,
+        metadata_cache: Optional[MetadataCache] = None,
+    ):
         self.url = url
         self.username = username
         self.password = password
         self.session = requests.Session()
         self.session.auth = (self.username, self.password)
+        self.state: Optional[ProjectState] = ProjectState() if use_cache else None
+        self.metrics = RequestMetrics()
+        self.fast_parse = fast_parse
+        self.metadata_cache = metadata_cache
+        self.notifications: Optional[NotificationListener] = None
         self.project_id = self.load_project(project_name).project_id
         self.compute_id = self.get_computes().computes[0].compute_id
 
+    def set_pool_size(self, size: int) -> None:
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def _make_request(self, method, endpoint, **kwargs):
+        return self._request(method, endpoint, **kwargs)[1]
+
+    def _request(self, method, endpoint, **kwargs) -> Tuple[int, object]:
+        # Same as _make_request, with the HTTP status alongside the data
         url = f"{self.url}{endpoint}"
-        response = self.session.request(method, url, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            self.metrics.record_request(method, endpoint, 0, time.perf_counter() - start, 0, 0.0)
+            raise
+        latency = time.perf_counter() - start
         # print(response.content)
         try:
             response.raise_for_status()
         except Exception as e:
             print(f"Warning: {str(e)}")
-        return response.json()
+        decode_start = time.perf_counter()
+        data = response.json() if response.content else {}
+        decode_time = time.perf_counter() - decode_start
+        self.metrics.record_request(method, endpoint, response.status_code, latency, len(response.content), decode_time)
+        return response.status_code, data
+
+    def _cached_get(self, endpoint: str):
+        cache = self.metadata_cache
+        if cache is None or not cache.is_cacheable(endpoint):
+            return self._make_request("GET", endpoint)
+        # Keyed by server too: a cache file reused with another --url must not answer for it
+        key = f"{self.url}{endpoint}"
+        data = cache.get(key)
+        if data is None:
+            status, data = self._request("GET", endpoint)
+            # Error payloads must not outlive the error, in memory or in the cache file
+            if 200 <= status < 300:
+                cache.set(key, data)
+        return data
 
     # Appliance Endpoints
     def get_appliances(self):
-        return self._make_request("GET", "/v2/appliances")
+        return self._cached_get("/v2/appliances")
 
     def get_compute(self, compute_id):
-        return self._make_request("GET", f"/v2/computes/{compute_id}")
+        return self._cached_get(f"/v2/computes/{compute_id}")
 
     # Drawing Endpoints
     def get_drawings(self, project_id):
@@ -59,24 +113,36 @@ class GNS3Connector:
 
     # Link Endpoints
     def get_all_links(self, project_id: str) -> LinksResponse:
-        data = self._make_request("GET", f"/v2/projects/{project_id}/links")
-        return LinksResponse(links=[LinkResponse(**link) for link in data])
+        if self._serves_locally(project_id):
+            return LinksResponse.model_construct(links=self.state.list_links())
+        endpoint = f"/v2/projects/{project_id}/links"
+        data = self._make_request("GET", endpoint)
+        with self.metrics.validation("GET", endpoint):
+            if self.fast_parse:
+                return LinksResponse.model_construct(links=LinkRecord.from_json_list(data))
+            return LinksResponse(links=[LinkResponse(**link) for link in data])
 
     def get_link(self, project_id, link_id):
         return self._make_request("GET", f"/v2/projects/{project_id}/links/{link_id}")
 
+    def delete_link(self, project_id: str, link_id: str):
+        data = self._make_request("DELETE", f"/v2/projects/{project_id}/links/{link_id}")
+        if self.state and project_id == self.project_id:
+            self.state.remove_link(link_id)
+        return data
+
     # Project Endpoints
     def get_projects(self):
-        data = self._make_request("GET", "/v2/projects")
-        print(data)
-        return ProjectsResponse(projects=[Project(**project) for project in data])
+        data = self._cached_get("/v2/projects")
+        with self.metrics.validation("GET", "/v2/projects"):
+            return ProjectsResponse(projects=[Project(**project) for project in data])
 
     def get_project(self, project_id):
         return self._make_request("GET", f"/v2/projects/{project_id}")
 
     # Server Endpoints
     def get_version(self):
-        return self._make_request("GET", "/v2/version")
+        return self._cached_get("/v2/version")
 
     def shutdown_server(self):
         return self._make_request("POST", "/v2/shutdown")
@@ -85,16 +151,26 @@ class GNS3Connector:
     def get_snapshots(self, project_id):
         return self._make_request("GET", f"/v2/projects/{project_id}/snapshots")
 
+    def create_snapshot(self, project_id, name: str):
+        return self._make_request("POST", f"/v2/projects/{project_id}/snapshots", json={"name": name})
+
+    def delete_snapshot(self, project_id, snapshot_id):
+        return self._make_request("DELETE", f"/v2/projects/{project_id}/snapshots/{snapshot_id}")
+
     def restore_snapshot(self, project_id, snapshot_id):
-        return self._make_request("POST", f"/v2/projects/{project_id}/snapshots/{snapshot_id}/restore")
+        data = self._make_request("POST", f"/v2/projects/{project_id}/snapshots/{snapshot_id}/restore")
+        if self.state and project_id == self.project_id:
+            self.state.clear()
+        return data
 
     # Template Endpoints
     def get_templates(self):
-        data = self._make_request("GET", "/v2/templates")
-        return TemplatesResponse(templates=[Template(**template) for template in data])
+        data = self._cached_get("/v2/templates")
+        with self.metrics.validation("GET", "/v2/templates"):
+            return TemplatesResponse(templates=[Template(**template) for template in data])
 
     def get_template(self, template_id):
-        return self._make_request("GET", f"/v2/templates/{template_id}")
+        return self._cached_get(f"/v2/templates/{template_id}")
 
     # /v2/projects/load¶
     def load_project(self, project_name):
@@ -108,27 +184,152 @@ class GNS3Connector:
         if not full_path:
             raise ValueError(f"Project {project_name} not found")
 
-        data = self._make_request("POST", "/v2/projects/load", json={"path": full_path})
-        return LoadProjectResponse(**data)
-
-    def create_node(self, project_id: str, compute_id, node_name: str, node_type: str, symbol: str) -> Node:
-        #  cloud, nat, ethernet_hub, ethernet_switch, frame_relay_switch, atm_switch, docker, dynamips, vpcs, traceng, virtualbox, vmware, iou, qemu
-        data = self._make_request(
-            "POST",
-            f"/v2/projects/{project_id}/nodes",
-            json={"name": node_name, "symbol": symbol, "node_type": node_type, "compute_id": compute_id},
+        return self.load_project_file(full_path)
+
+    def load_project_file(self, path: str) -> LoadProjectResponse:
+        data = self._make_request("POST", "/v2/projects/load", json={"path": path})
+        if self.state:
+            self.state.clear()
+        with self.metrics.validation("POST", "/v2/projects/load"):
+            return LoadProjectResponse(**data)
+
+    # Local state cache
+    def enable_cache(self) -> ProjectState:
+        if not self.state:
+            self.state = ProjectState()
+        return self.refresh_cache()
+
+    def disable_cache(self) -> None:
+        self.state = None
+
+    def refresh_cache(self) -> ProjectState:
+        if not self.state:
+            raise ValueError("State cache is disabled, call enable_cache first")
+        self.state.load(self.get_nodes(self.project_id), self.get_all_links(self.project_id).links)
+        return self.state
+
+    def subscribe(self, timeout: float = 10.0, reconnect_delay: float = 1.0) -> NotificationListener:
+        # Keep the state cache current from the notification stream; while it is in
+        # sync, get_nodes/get_all_links for this project are answered from it
+        if self.notifications is None:
+            if not self.state:
+                self.state = ProjectState()
+            self.notifications = NotificationListener(self, reconnect_delay).start()
+        if not self.notifications.wait_synced(timeout):
+            print(f"Warning: notification stream for project {self.project_id} not in sync after {timeout}s")
+        return self.notifications
+
+    def unsubscribe(self) -> None:
+        if self.notifications is not None:
+            self.notifications.stop()
+            self.notifications = None
+
+    def _serves_locally(self, project_id: str) -> bool:
+        return (
+            self.notifications is not None
+            and self.notifications.synced.is_set()
+            and project_id == self.project_id
+            and self.state is not None
+            and self.state.loaded
         )
-        return Node(**data)
 
-    def get_nodes(self, project_id: str) -> List[Node]:
-        data = self._make_request("GET", f"/v2/projects/{project_id}/nodes")
-        return NodesResponse(nodes=[Node(**node) for node in data]).nodes
+    def invalidate_cache(self) -> None:
+        if self.state:
+            self.state.clear()
+
+    def _get_state(self) -> Optional[ProjectState]:
+        if self.state and not self.state.loaded:
+            self.refresh_cache()
+        return self.state
+
+    def create_node(
+        self,
+        project_id: str,
+        compute_id,
+        node_name: str,
+        node_type: str,
+        symbol: str,
+        properties: Optional[Dict] = None,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> Node:
+        #  cloud, nat, ethernet_hub, ethernet_switch, frame_relay_switch, atm_switch, docker, dynamips, vpcs, traceng, virtualbox, vmware, iou, qemu
+        endpoint = f"/v2/projects/{project_id}/nodes"
+        node_data = {"name": node_name, "symbol": symbol, "node_type": node_type, "compute_id": compute_id}
+        if properties:
+            node_data["properties"] = properties
+        if position:
+            node_data["x"], node_data["y"] = position
+        data = self._make_request("POST", endpoint, json=node_data)
+        with self.metrics.validation("POST", endpoint):
+            node = NodeRecord.from_json(data) if self.fast_parse else Node(**data)
+        if self.state and self.state.loaded and project_id == self.project_id:
+            self.state.add_node(node)
+        return node
+
+    def get_nodes(self, project_id: str, fields: Optional[Iterable[str]] = None) -> List[Node]:
+        if self._serves_locally(project_id):
+            return self.state.list_nodes()
+        endpoint = f"/v2/projects/{project_id}/nodes"
+        data = self._make_request("GET", endpoint)
+        with self.metrics.validation("GET", endpoint):
+            if self.fast_parse or fields:
+                return NodeRecord.from_json_list(data, fields)
+            return NodesResponse(nodes=[Node(**node) for node in data]).nodes
 
     def get_node(self, project_id: str, node_id: str) -> Node:
-        data = self._make_request("GET", f"/v2/projects/{project_id}/nodes/{node_id}")
-        return Node(**data)
-
-    def get_node_by_name(self, node_name: str):
+        endpoint = f"/v2/projects/{project_id}/nodes/{node_id}"
+        data = self._make_request("GET", endpoint)
+        with self.metrics.validation("GET", endpoint):
+            return Node(**data)
+
+    def delete_node(self, project_id: str, node_id: str):
+        data = self._make_request("DELETE", f"/v2/projects/{project_id}/nodes/{node_id}")
+        if self.state and project_id == self.project_id:
+            self.state.remove_node(node_id)
+        return data
+
+    def start_node(self, project_id: str, node_id: str):
+        return self._make_request("POST", f"/v2/projects/{project_id}/nodes/{node_id}/start")
+
+    def stop_node(self, project_id: str, node_id: str):
+        return self._make_request("POST", f"/v2/projects/{project_id}/nodes/{node_id}/stop")
+
+    def start_all_nodes(self, project_id: str):
+        return self._make_request("POST", f"/v2/projects/{project_id}/nodes/start")
+
+    def stop_all_nodes(self, project_id: str):
+        return self._make_request("POST", f"/v2/projects/{project_id}/nodes/stop")
+
+    def _run_batch(self, function: Callable, items: List[str], workers: int) -> List[str]:
+        # Returns the items whose request failed
+        failed = []
+        if not items:
+            return failed
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+            futures = {executor.submit(function, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    data = future.result()
+                except requests.RequestException as e:
+                    data = {"message": str(e)}
+                if data and data.get("message"):
+                    print(f"{futures[future]}: {data['message']}")
+                    failed.append(futures[future])
+        return failed
+
+    def delete_links(self, project_id: str, link_ids: Iterable[str], workers: int = 8) -> List[str]:
+        return self._run_batch(lambda link_id: self.delete_link(project_id, link_id), list(link_ids), workers)
+
+    def delete_nodes(self, project_id: str, node_ids: Iterable[str], workers: int = 8) -> List[str]:
+        return self._run_batch(lambda node_id: self.delete_node(project_id, node_id), list(node_ids), workers)
+
+    def stop_nodes(self, project_id: str, node_ids: Iterable[str], workers: int = 8) -> List[str]:
+        return self._run_batch(lambda node_id: self.stop_node(project_id, node_id), list(node_ids), workers)
+
+    def get_node_by_name(self, node_name: str) -> Optional[Node]:
+        state = self._get_state()
+        if state:
+            return state.get_node_by_name(node_name)
         nodes = self.get_nodes(self.project_id)
         for node in nodes:
             if node.name == node_name:
@@ -137,19 +338,55 @@ class GNS3Connector:
 
     def register_compute(self, compute_data: ComputeInput) -> ComputeOutput:
         data = self._make_request("POST", "/v2/computes", json=compute_data.model_dump())
+        if self.metadata_cache:
+            self.metadata_cache.invalidate(group="computes")
         return ComputeOutput(**data)
 
     def get_computes(self) -> ComputesResponse:
-        data = self._make_request("GET", "/v2/computes")
-        return ComputesResponse(computes=[ComputeOutput(**compute) for compute in data])
+        data = self._cached_get("/v2/computes")
+        with self.metrics.validation("GET", "/v2/computes"):
+            return ComputesResponse(computes=[ComputeOutput(**compute) for compute in data])
+
+    def create_switch(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self.create_node(
+            self.project_id,
+            compute_id or self.compute_id,
+            name,
+            "ethernet_switch",
+            GNS3Connector.ethernet_switch_symbol_path,
+            position=position,
+        )
 
-    def create_switch(self, name: str) -> Node:
+    def create_vpcs(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
         return self.create_node(
-            self.project_id, self.compute_id, name, "ethernet_switch", GNS3Connector.ethernet_switch_symbol_path
+            self.project_id,
+            compute_id or self.compute_id,
+            name,
+            "vpcs",
+            GNS3Connector.vpcs_symbol_path,
+            position=position,
         )
 
-    def create_vpcs(self, name: str) -> Node:
-        return self.create_node(self.project_id, self.compute_id, name, "vpcs", GNS3Connector.vpcs_symbol_path)
+    def create_cloud(
+        self,
+        name: str,
+        ports_mapping: List[Dict],
+        compute_id: Optional[str] = None,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> Node:
+        return self.create_node(
+            self.project_id,
+            compute_id or self.compute_id,
+            name,
+            "cloud",
+            GNS3Connector.cloud_symbol_path,
+            {"ports_mapping": ports_mapping},
+            position,
+        )
 
     def create_link(
         self, first_node_name: str, second_node_name: str, first_node_port: LinkNode, second_node_port: LinkNode
@@ -179,17 +416,30 @@ class GNS3Connector:
                 }
             )
         )
+        return self.create_link_from_ports(*nodes_request)
 
-        link_data = LinkRequest(nodes=nodes_request).model_dump()
-        data = self._make_request("POST", f"/v2/projects/{self.project_id}/links", json=link_data)
+    def create_link_from_ports(self, first_node_port: LinkNode, second_node_port: LinkNode) -> LinkResponse | Dict:
+        link_data = LinkRequest(nodes=[first_node_port, second_node_port]).model_dump()
+        endpoint = f"/v2/projects/{self.project_id}/links"
+        data = self._make_request("POST", endpoint, json=link_data)
         if data.get("message"):
             return data
-        else:
-            return LinkResponse(**data)
-
-    def create_router(self, router_name: str):
+        with self.metrics.validation("POST", endpoint):
+            link = LinkRecord.from_json(data) if self.fast_parse else LinkResponse(**data)
+        if self.state and self.state.loaded:
+            self.state.add_link(link)
+        return link
+
+    def create_router(
+        self, router_name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
         return self.create_node(
-            self.project_id, self.compute_id, router_name, "ethernet_switch", GNS3Connector.router_symbol_path
+            self.project_id,
+            compute_id or self.compute_id,
+            router_name,
+            "ethernet_switch",
+            GNS3Connector.router_symbol_path,
+            position=position,
         )
 
     def get_links_from_node(self, project_id: str, node_id: str) -> LinksResponse:
@@ -199,6 +449,13 @@ class GNS3Connector:
 
     def get_free_port_for_node(self, project_id: str, node_name: str) -> Optional[Port]:
         node = self.get_node_by_name(node_name)
+        state = self._get_state()
+        if state:
+            for port in node.ports:
+                if not state.is_port_used(node.node_id, port.adapter_number, port.port_number):
+                    return port
+            return None
+
         # used_ports = {port["port_number"] for port in data["ports"]}
         # max_ports = data.get("port_segment_size", 16)  # Default maximum ports
         all_links = self.get_all_links(self.project_id)
@@ -0,0 +1,143 @@
+import json
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from gns3_connector import GNS3Connector
+from interface import KIND_NODE_TYPES
+from port_allocator import PortAllocator
+
+GNS3_FILE_REVISION = 9
+GNS3_FILE_VERSION = "2.2.0"
+DEFAULT_SWITCH_PORTS = 8
+
+KIND_SYMBOLS: Dict[str, str] = {
+    "vpcs": GNS3Connector.vpcs_symbol_path,
+    "switch": GNS3Connector.ethernet_switch_symbol_path,
+    "router": GNS3Connector.router_symbol_path,
+}
+
+
+def _node_ports(kind: str, degree: int) -> List[Tuple[int, int]]:
+    if kind == "vpcs":
+        return [(0, 0)]
+    return [(0, port_number) for port_number in range(max(DEFAULT_SWITCH_PORTS, degree))]
+
+
+def _node_properties(kind: str, ports: List[Tuple[int, int]]) -> Dict:
+    if KIND_NODE_TYPES[kind] != "ethernet_switch":
+        return {}
+    return {
+        "ports_mapping": [
+            {"name": f"Ethernet{port_number}", "port_number": port_number, "type": "access", "vlan": 1, "ethertype": ""}
+            for _, port_number in ports
+        ]
+    }
+
+
+def _grid_positions(nodes: List[Tuple[str, str, str]], spacing: int = 100) -> Dict[str, Tuple[int, int]]:
+    positions = {}
+    rows: Dict[str, int] = {}
+    columns: Dict[str, int] = {}
+    for name, _, area_name in nodes:
+        row = rows.setdefault(area_name, len(rows))
+        column = columns.get(area_name, 0)
+        columns[area_name] = column + 1
+        positions[name] = (column * spacing, row * spacing)
+    return positions
+
+
+def build_project(
+    nodes: Iterable[Tuple[str, str, str]],
+    links: Iterable[Tuple[str, str]],
+    project_name: str,
+    project_id: Optional[str] = None,
+    compute_id: str = "local",
+    positions: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> Dict:
+    nodes = list(nodes)
+    links = list(links)
+    if positions is None:
+        positions = _grid_positions(nodes)
+
+    degrees: Dict[str, int] = {}
+    for source, target in links:
+        degrees[source] = degrees.get(source, 0) + 1
+        degrees[target] = degrees.get(target, 0) + 1
+
+    allocator = PortAllocator()
+    project_nodes = []
+    for name, kind, _ in nodes:
+        node_id = str(uuid.uuid4())
+        ports = _node_ports(kind, degrees.get(name, 0))
+        allocator.register(name, node_id, ports)
+        x, y = positions.get(name, (0, 0))
+        project_nodes.append(
+            {
+                "compute_id": compute_id,
+                "console": None,
+                "console_auto_start": False,
+                "console_type": "telnet" if kind == "vpcs" else "none",
+                "custom_adapters": [],
+                "first_port_name": None,
+                "height": 59,
+                "label": {"rotation": 0, "style": None, "text": name, "x": 0, "y": -25},
+                "locked": False,
+                "name": name,
+                "node_id": node_id,
+                "node_type": KIND_NODE_TYPES[kind],
+                "port_name_format": "Ethernet{0}",
+                "port_segment_size": 0,
+                "properties": _node_properties(kind, ports),
+                "symbol": KIND_SYMBOLS[kind],
+                "template_id": None,
+                "width": 65,
+                "x": int(x),
+                "y": int(y),
+                "z": 1,
+            }
+        )
+
+    project_links = []
+    for source, target in links:
+        link_nodes = [allocator.reserve(source), allocator.reserve(target)]
+        project_links.append(
+            {
+                "filters": {},
+                "link_id": str(uuid.uuid4()),
+                "link_style": {},
+                "nodes": [link_node.model_dump() for link_node in link_nodes],
+                "suspend": False,
+            }
+        )
+
+    return {
+        "auto_close": True,
+        "auto_open": False,
+        "auto_start": False,
+        "drawing_grid_size": 25,
+        "grid_size": 75,
+        "name": project_name,
+        "project_id": project_id or str(uuid.uuid4()),
+        "revision": GNS3_FILE_REVISION,
+        "scene_height": 1000,
+        "scene_width": 2000,
+        "show_grid": False,
+        "show_interface_labels": False,
+        "show_layers": False,
+        "snap_to_grid": False,
+        "supplier": None,
+        "topology": {"computes": [], "drawings": [], "links": project_links, "nodes": project_nodes},
+        "type": "topology",
+        "variables": None,
+        "version": GNS3_FILE_VERSION,
+        "zoom": 100,
+    }
+
+
+def write_project(project: Dict, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{project['name']}.gns3")
+    with open(path, "w") as project_file:
+        json.dump(project, project_file)
+    return path
@@ -1,27 +1,148 @@
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from data_structure.links import LinkResponse
+from data_structure.nodes import Node
+from data_structure.records import PORT_FIELDS, TEARDOWN_FIELDS
 from gns3_connector import GNS3Connector
+from port_allocator import PortAllocator
+
+KIND_NODE_TYPES: Dict[str, str] = {"vpcs": "vpcs", "switch": "ethernet_switch", "router": "ethernet_switch"}
 
 
 class HyperInterface:
     def __init__(self, connector: GNS3Connector) -> None:
         self.connector: GNS3Connector = connector
+        self.port_allocator: Optional[PortAllocator] = None
+        self._allocator_lock = Lock()
+
+    def get_port_allocator(self) -> PortAllocator:
+        with self._allocator_lock:
+            if self.port_allocator is None:
+                state = self.connector.state
+                if state and state.loaded:
+                    nodes, links = list(state.nodes_by_id.values()), list(state.links.values())
+                else:
+                    nodes = self.connector.get_nodes(self.connector.project_id, fields=PORT_FIELDS)
+                    links = self.connector.get_all_links(self.connector.project_id).links
+                self.port_allocator = PortAllocator.from_project(nodes, links)
+            return self.port_allocator
+
+    def _register_node(self, node: Node) -> Node:
+        if self.port_allocator is not None:
+            self.port_allocator.register_node(node)
+        return node
+
+    def create_switch(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(self.connector.create_switch(name, compute_id, position))
+
+    def create_vpcs(
+        self, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(self.connector.create_vpcs(name, compute_id, position))
 
-    def create_switch(self, name: str):
-        self.connector.create_switch(name)
+    def create_router(
+        self, router_name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        return self._register_node(self.connector.create_router(router_name, compute_id, position))
 
-    def create_vpcs(self, name: str):
-        self.connector.create_vpcs(name)
+    def create_cloud(
+        self,
+        name: str,
+        ports_mapping: List[Dict],
+        compute_id: Optional[str] = None,
+        position: Optional[Tuple[int, int]] = None,
+    ) -> Node:
+        return self._register_node(self.connector.create_cloud(name, ports_mapping, compute_id, position))
 
-    def create_router(self, router_name: str):
-        self.connector.create_router(router_name)
+    def create(
+        self, kind: str, name: str, compute_id: Optional[str] = None, position: Optional[Tuple[int, int]] = None
+    ) -> Node:
+        if kind == "vpcs":
+            return self.create_vpcs(name, compute_id, position)
+        if kind == "switch":
+            return self.create_switch(name, compute_id, position)
+        if kind == "router":
+            return self.create_router(name, compute_id, position)
+        raise ValueError(f"Unknown node kind {kind}")
 
-    def create_link(self, first_node_name: str, second_node_name: str):
+    def create_link(self, first_node_name: str, second_node_name: str) -> LinkResponse:
+        print(f"Je crée entre {first_node_name} et {second_node_name}")
+        allocator = self.get_port_allocator()
+        first_node_port = allocator.reserve(first_node_name)
         try:
-            print(f"Je crée entre {first_node_name} et {second_node_name}")
-            first_node_port = self.connector.get_free_port_for_node(self.connector.project_id, first_node_name)
-            second_node_port = self.connector.get_free_port_for_node(self.connector.project_id, second_node_name)
-            self.connector.create_link(first_node_name, second_node_name, first_node_port, second_node_port)
-        except Exception as e:
-            print(e)
+            second_node_port = allocator.reserve(second_node_name)
+        except ValueError:
+            allocator.release(first_node_port)
+            raise
+        link = self.connector.create_link_from_ports(first_node_port, second_node_port)
+        if isinstance(link, dict):
+            allocator.release(first_node_port)
+            allocator.release(second_node_port)
+            raise ValueError(f"Link {first_node_name}-{second_node_name} refused: {link.get('message')}")
+        allocator.attach_link(link)
+        return link
+
+    def delete_link(self, link_id: str):
+        data = self.connector.delete_link(self.connector.project_id, link_id)
+        if self.port_allocator is not None:
+            self.port_allocator.release_link(link_id)
+        return data
+
+    def delete_node(self, node: Node):
+        data = self.connector.delete_node(self.connector.project_id, node.node_id)
+        if self.port_allocator is not None:
+            self.port_allocator.forget(node.node_id)
+        return data
+
+    def teardown(self, prefix: Optional[str] = None, workers: int = 8, stop_first: bool = False) -> Dict[str, float]:
+        # Deletes the links then the nodes whose name starts with prefix (every node
+        # when prefix is None); area nodes are named "<area>-..." so "A-" selects area A
+        connector = self.connector
+        project_id = connector.project_id
+        connector.set_pool_size(workers)
+        start = time.perf_counter()
+        nodes = connector.get_nodes(project_id, fields=TEARDOWN_FIELDS)
+        links = connector.get_all_links(project_id).links
+        if prefix:
+            nodes = [node for node in nodes if node.name.startswith(prefix)]
+            node_ids = {node.node_id for node in nodes}
+            links = [link for link in links if any(link_node.node_id in node_ids for link_node in link.nodes)]
+        listed = time.perf_counter()
+
+        if stop_first:
+            if prefix:
+                connector.stop_nodes(project_id, [node.node_id for node in nodes if node.status != "stopped"], workers)
+            else:
+                connector.stop_all_nodes(project_id)
+        stopped = time.perf_counter()
+
+        failed_links = set(connector.delete_links(project_id, [link.link_id for link in links], workers))
+        links_done = time.perf_counter()
+        failed_nodes = set(connector.delete_nodes(project_id, [node.node_id for node in nodes], workers))
+        nodes_done = time.perf_counter()
+
+        if self.port_allocator is not None:
+            if prefix:
+                for link in links:
+                    if link.link_id not in failed_links:
+                        self.port_allocator.release_link(link.link_id)
+                for node in nodes:
+                    if node.node_id not in failed_nodes:
+                        self.port_allocator.forget(node.node_id)
+            else:
+                self.port_allocator = None
+        print(f"Deleted {len(links) - len(failed_links)} links and {len(nodes) - len(failed_nodes)} nodes")
+        return {
+            "list": listed - start,
+            "stop": stopped - listed,
+            "links": links_done - stopped,
+            "nodes": nodes_done - links_done,
+            "total": nodes_done - start,
+        }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+LAYOUT_MODES = ("grid", "circle")
+DEFAULT_NODE_SPACING = 80
+RING_ROTATION = math.pi / 12
+
+
+def area_centers(count: int, spacing: float, mode: str = "grid") -> np.ndarray:
+    if mode not in LAYOUT_MODES:
+        raise ValueError(f"Unknown layout mode {mode}, expected one of {', '.join(LAYOUT_MODES)}")
+    indexes = np.arange(count)
+    if mode == "grid":
+        columns = max(1, math.ceil(math.sqrt(count)))
+        return np.stack([indexes % columns, indexes // columns], axis=1) * spacing
+    if count == 1:
+        return np.zeros((1, 2))
+    # Neighbouring areas on the circle are at least `spacing` apart
+    radius = spacing / (2 * math.sin(math.pi / count))
+    angles = 2 * math.pi * indexes / count
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1) * radius
+
+
+def ring_offsets(local_indexes: np.ndarray, area_sizes: np.ndarray, spacing: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Ring k (k >= 1) holds 6k nodes at radius k * spacing, so rings 1..k hold 3k(k+1)
+    # nodes. The last ring of an area spreads its remaining nodes evenly. Ring k is turned
+    # by RING_ROTATION / k, which keeps leaves off the axes (where links to neighbouring
+    # areas run) and out of line with the rings inside it.
+    ring = np.ceil((-3 + np.sqrt(9 + 12 * (local_indexes + 1))) / 6).astype(np.int64)
+    ring = np.maximum(ring, 1)
+    ring_start = 3 * ring * (ring - 1)
+    on_ring = np.minimum(6 * ring, area_sizes - ring_start)
+    angles = 2 * math.pi * (local_indexes - ring_start) / on_ring + RING_ROTATION / ring
+    offsets = np.stack([np.cos(angles), np.sin(angles)], axis=1) * (ring * spacing)[:, None]
+    return offsets, ring
+
+
+def layout_topology(
+    topology, mode: str = "grid", node_spacing: float = DEFAULT_NODE_SPACING
+) -> Dict[str, Tuple[int, int]]:
+    areas = list(topology.areas)
+    if not areas:
+        return {}
+
+    names: List[str] = []
+    area_indexes: List[int] = []
+    local_indexes: List[int] = []
+    sizes = np.empty(len(areas), dtype=np.int64)
+    for area_index, area in enumerate(areas):
+        count = 0
+        for node in area.nodes:
+            names.append(node.name)
+            area_indexes.append(area_index)
+            local_indexes.append(count)
+            count += 1
+        sizes[area_index] = count
+
+    area_index_array = np.asarray(area_indexes, dtype=np.int64)
+    offsets, rings = ring_offsets(np.asarray(local_indexes, dtype=np.int64), sizes[area_index_array], node_spacing)
+    area_rings = np.zeros(len(areas), dtype=np.int64)
+    if len(rings):
+        np.maximum.at(area_rings, area_index_array, rings)
+    spacing = (2 * int(area_rings.max()) + 2) * node_spacing
+    centers = area_centers(len(areas), spacing, mode)
+
+    coordinates = np.rint(centers[area_index_array] + offsets).astype(np.int64).tolist()
+    positions: Dict[str, Tuple[int, int]] = dict(zip(names, map(tuple, coordinates)))
+    area_index_by_name = {area.name: index for index, area in enumerate(areas)}
+    for area, (x, y) in zip(areas, np.rint(centers).astype(np.int64).tolist()):
+        positions[area.central_node.name] = (x, y)
+
+    # Medium routers sit just outside the source area, towards the target area. Area
+    # spacing keeps that spot clear of every area's rings; routers that would share
+    # it are moved sideways.
+    taken = set(positions.values())
+    for link in topology.links:
+        if not link.medium_node:
+            continue
+        source = area_index_by_name[link.source_area.name]
+        target = area_index_by_name[link.target_area.name]
+        (source_x, source_y), (target_x, target_y) = centers[source], centers[target]
+        length = math.hypot(target_x - source_x, target_y - source_y) or 1.0
+        direction_x, direction_y = (target_x - source_x) / length, (target_y - source_y) / length
+        distance = (area_rings[source] + 1) * node_spacing
+        base_x, base_y = source_x + direction_x * distance, source_y + direction_y * distance
+        shift = 0
+        position = (round(base_x), round(base_y))
+        while position in taken:
+            shift += 1
+            offset = shift * node_spacing
+            position = (round(base_x - direction_y * offset), round(base_y + direction_x * offset))
+        taken.add(position)
+        positions[link.medium_node.name] = position
+    return positions
@@ -1,21 +1,57 @@
-from code import interact
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import random
-from typing import Dict, List, Optional
-from matplotlib.colors import hex2color
-import networkx as nx
-import matplotlib.pyplot as plt
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, ValuesView
 
+from capacity import CapacityReport, cascade_topology, check_capacity, place_cascades, port_budgets
+from compact_topology import CompactTopology
+from compute_scheduler import ComputeScheduler
+from data_structure.records import PORT_FIELDS
+from deploy_journal import DeployJournal, journaled, link_operation, node_operation
+from deploy_plan import AsyncExecutor, DeployPlan, SequentialExecutor, ThreadedExecutor
 from gns3_connector import GNS3Connector
+from gns3_project_file import build_project, write_project
 from interface import HyperInterface
+from port_allocator import PortAllocator
+from reconcile import ReconcilePlan, diff_project
+from request_metrics import RequestMetrics
+from sharding import Shard, ShardMap
+from snapshot_cache import SnapshotCache, topology_hash
+
+if TYPE_CHECKING:
+    from async_interface import AsyncHyperInterface
+
+# Leaves room on the default 8-port central switch for the two inter-area links
+STAR_CHAIN_AREA_SIZE = 6
+
+
+def link_key(source_name: str, target_name: str) -> Tuple[str, str]:
+    if source_name <= target_name:
+        return source_name, target_name
+    return target_name, source_name
 
 
 class TopologyNode:
+    __slots__ = ("area", "name", "type", "links")
+
     def __init__(self, name: str, area: "TopologyArea", type_: str = "Standard"):
         self.area = area
-        self.name = area.name + "-" + name
+        self.name = sys.intern(area.name + "-" + name)
         self.type = type_
         self.links = []
 
+    @property
+    def kind(self) -> str:
+        return "switch" if self.type == "Switch" else "vpcs"
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyNode) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
     def __str__(self):
         return self.name
 
@@ -24,89 +60,127 @@ class TopologyNode:
 
 
 class TopologyAreaInLink:
+    __slots__ = ("source", "target")
+
     def __init__(self, source: TopologyNode, target: TopologyNode):
-        self.name: str = source.name + "-" + target.name
         self.source: TopologyNode = source
         self.target: TopologyNode = target
 
+    @property
+    def name(self) -> str:
+        return self.source.name + "-" + self.target.name
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return link_key(self.source.name, self.target.name)
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyAreaInLink) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
 
 class TopologyArea:
     def __init__(self, global_topology: "GlobalTopology", name: str):
         self.global_topology = global_topology
-        self.name = name
-        self.nodes: List[TopologyNode] = []
-        self.links: List[TopologyAreaInLink] = []
+        self.name = sys.intern(name)
+        self._nodes: Dict[str, TopologyNode] = {}
+        self._links: Dict[Tuple[str, str], TopologyAreaInLink] = {}
+        # Neighbours keyed by name, in insertion order so exports are reproducible
+        self._adjacency: Dict[str, Dict[str, TopologyNode]] = {}
         self.central_node = TopologyNode("Central", self)
 
-    def add_node(self, node: TopologyNode) -> bool:
-        if node not in self.nodes:
-            self.nodes.append(node)
-            return True
+    @property
+    def nodes(self) -> ValuesView[TopologyNode]:
+        return self._nodes.values()
+
+    @property
+    def links(self) -> ValuesView[TopologyAreaInLink]:
+        return self._links.values()
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyArea) and self.name == other.name
 
-        return False
+    def __hash__(self):
+        return hash(self.name)
 
-    def create_node(self, name: str, link_to_central: bool = True) -> TopologyNode:
-        new_node = TopologyNode(name, self)
-        if new_node not in self.nodes:
-            self.nodes.append(new_node)
-            if link_to_central:
-                self.create_link(self.central_node, new_node)
-            return new_node
-        raise ValueError(f"Node {name} already exists")
+    def has_node(self, name: str) -> bool:
+        return name in self._nodes or name == self.central_node.name
+
+    def add_node(self, node: TopologyNode) -> bool:
+        if self.has_node(node.name):
+            return False
+        self._nodes[node.name] = node
+        return True
+
+    def create_node(self, name: str, link_to_central: bool = True, type_: str = "Standard") -> TopologyNode:
+        new_node = TopologyNode(name, self, type_)
+        if not self.add_node(new_node):
+            raise ValueError(f"Node {name} already exists")
+        if link_to_central:
+            self.create_link(self.central_node, new_node)
+        return new_node
 
     def get_node(self, name: str) -> TopologyNode:
-        for node in self.nodes:
-            if node.name == name:
-                return node
-        raise ValueError(f"Node {name} not found")
+        if name == self.central_node.name:
+            return self.central_node
+        node = self._nodes.get(name)
+        if node is None:
+            raise ValueError(f"Node {name} not found")
+        return node
 
     def remove_node(self, node: TopologyNode) -> bool:
-        if node in self.nodes:
-            self.nodes.remove(node)
-            return True
-        return False
+        if self._nodes.pop(node.name, None) is None:
+            return False
+        for neighbor in list(self._adjacency.get(node.name, {}).values()):
+            self.remove_link(node, neighbor)
+        self._adjacency.pop(node.name, None)
+        return True
 
     def add_link(self, link: TopologyAreaInLink) -> bool:
-        if link not in self.links:
-            self.links.append(link)
-            return True
-        return False
+        if link.key in self._links:
+            return False
+        self._links[link.key] = link
+        self._adjacency.setdefault(link.source.name, {})[link.target.name] = link.target
+        self._adjacency.setdefault(link.target.name, {})[link.source.name] = link.source
+        return True
+
+    def has_link(self, source: TopologyNode, target: TopologyNode) -> bool:
+        return link_key(source.name, target.name) in self._links
 
     def create_link(self, source: TopologyNode, target: TopologyNode) -> TopologyAreaInLink:
         new_link = TopologyAreaInLink(source, target)
-        new_link2 = TopologyAreaInLink(target, source)
-        if new_link not in self.links:
-            self.add_link(new_link)
-            self.add_link(new_link2)
+        if self.add_link(new_link):
             return new_link
         raise ValueError(f"Link {source.name}-{target.name} already exists")
 
-    def remove_link(self, source: str, target: str) -> bool:
-        for link in self.links:
-            if link.source == source and link.target == target:
-                self.links.remove(link)
-                return True
-        return False
+    def remove_link(self, source: TopologyNode | str, target: TopologyNode | str) -> bool:
+        source_name = source if isinstance(source, str) else source.name
+        target_name = target if isinstance(target, str) else target.name
+        link = self._links.pop(link_key(source_name, target_name), None)
+        if link is None:
+            return False
+        del self._adjacency[link.source.name][link.target.name]
+        del self._adjacency[link.target.name][link.source.name]
+        return True
 
     def get_neighbors(self, node: TopologyNode) -> List[TopologyNode]:
-        neighbors = []
-        for link in self.links:
-            if link.source == node:
-                neighbors.append(link.target)
-            elif link.target == node:
-                neighbors.append(link.source)
-
-        return neighbors
+        return list(self._adjacency.get(node.name, {}).values())
 
 
 class TopologyMediumNode:
+    __slots__ = ("links", "name")
+
     def __init__(self, links: List[TopologyArea]):
         self.links: List[TopologyArea] = links
         concat_name = "-".join(map(lambda node: node.name, links))
-        self.name = f"Medium-{concat_name}"
+        self.name = sys.intern(f"Medium-{concat_name}")
 
 
 class TopologyLink:
+    __slots__ = ("name", "source_area", "target_area", "source_node", "target_node", "medium_node")
+
     def __init__(
         self,
         source: "TopologyArea",
@@ -126,25 +200,44 @@ class TopologyLink:
         else:
             self.medium_node = None
 
+    @property
+    def key(self) -> Tuple[str, str]:
+        return link_key(self.source_node.name, self.target_node.name)
+
+    def __eq__(self, other):
+        return isinstance(other, TopologyLink) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
 
 class GlobalTopology:
     def __init__(self):
-        self.areas: List[TopologyArea] = []
-        self.links: List[TopologyLink] = []
+        self._areas: Dict[str, TopologyArea] = {}
+        self._links: Dict[Tuple[str, str], TopologyLink] = {}
+        self._links_by_area: Dict[str, List[TopologyLink]] = {}
         self.medium_nodes: List[TopologyMediumNode] = []
 
+    @property
+    def areas(self) -> ValuesView[TopologyArea]:
+        return self._areas.values()
+
+    @property
+    def links(self) -> ValuesView[TopologyLink]:
+        return self._links.values()
+
     def create_area(self, name: str) -> TopologyArea:
+        if name in self._areas:
+            raise ValueError(f"Area {name} already exists")
         new_area = TopologyArea(self, name)
-        if new_area not in self.areas:
-            self.areas.append(new_area)
-            return new_area
-        raise ValueError(f"Area {name} already exists")
+        self._areas[name] = new_area
+        return new_area
 
     def get_area(self, name: str) -> TopologyArea:
-        for area in self.areas:
-            if area.name == name:
-                return area
-        raise ValueError(f"Area {name} not found")
+        area = self._areas.get(name)
+        if area is None:
+            raise ValueError(f"Area {name} not found")
+        return area
 
     def create_link(
         self,
@@ -159,37 +252,266 @@ class GlobalTopology:
         if not target_node:
             target_node = target_area.central_node
 
+        if link_key(source_node.name, target_node.name) in self._links:
+            return False
+
         medium_node = None
         if create_medium_node:
             medium_node = TopologyMediumNode([source_area, target_area])
             self.medium_nodes.append(medium_node)
 
         new_link = TopologyLink(source_area, target_area, source_node, target_node, medium_node)
-        if new_link not in self.links:
-            self.links.append(new_link)
-            return True
-        return False
+        self._links[new_link.key] = new_link
+        self._links_by_area.setdefault(source_area.name, []).append(new_link)
+        return True
 
     def get_neighbors(self, source_area: TopologyArea) -> Dict[TopologyArea, List[TopologyNode]]:
         neighbors = {}
         for link in self.get_links_from_area(source_area):
-            if link.source_area == source_area:
-                neighbors.setdefault(link.target_area, []).append(link.target_node)
+            neighbors.setdefault(link.target_area, []).append(link.target_node)
         return neighbors
 
     def get_links_from_area(self, area: TopologyArea) -> List[TopologyLink]:
-        area_links = []
+        return list(self._links_by_area.get(area.name, []))
+
+    # Bulk builders
+    def build_star(self, name: str, count: int, pattern: str = "{area}{index}") -> TopologyArea:
+        area = self.create_area(name)
+        for index in range(count):
+            area.create_node(pattern.format(area=name, index=index))
+        return area
+
+    def build_ring(self, name: str, count: int, pattern: str = "{area}{index}") -> TopologyArea:
+        area = self.create_area(name)
+        nodes = [area.create_node(pattern.format(area=name, index=index), False, "Switch") for index in range(count)]
+        for index in range(1, count):
+            area.create_link(nodes[index - 1], nodes[index])
+        if count > 2:
+            area.create_link(nodes[-1], nodes[0])
+        if nodes:
+            area.create_link(area.central_node, nodes[0])
+        return area
+
+    def build_mesh(self, name: str, count: int, pattern: str = "{area}{index}") -> TopologyArea:
+        area = self.create_area(name)
+        nodes = [area.create_node(pattern.format(area=name, index=index), False, "Switch") for index in range(count)]
+        for index, source in enumerate(nodes):
+            for target in nodes[index + 1 :]:
+                area.create_link(source, target)
+        if nodes:
+            area.create_link(area.central_node, nodes[0])
+        return area
+
+    def build_tree(self, name: str, depth: int, arity: int, pattern: str = "{area}{index}") -> TopologyArea:
+        area = self.create_area(name)
+        level = [area.central_node]
+        index = 0
+        for current_depth in range(1, depth + 1):
+            type_ = "Standard" if current_depth == depth else "Switch"
+            next_level = []
+            for parent in level:
+                for _ in range(arity):
+                    child = area.create_node(pattern.format(area=name, index=index), False, type_)
+                    area.create_link(parent, child)
+                    next_level.append(child)
+                    index += 1
+            level = next_level
+        return area
+
+    def build_fat_tree(self, name: str, k: int, pattern: str = "{area}{role}{index}") -> TopologyArea:
+        if k < 2 or k % 2:
+            raise ValueError(f"Fat-tree arity must be an even number >= 2, got {k}")
+        area = self.create_area(name)
+        half = k // 2
+
+        def node(role: str, index: int, type_: str = "Switch") -> TopologyNode:
+            return area.create_node(pattern.format(area=name, role=role, index=index), False, type_)
+
+        cores = [node("Core", index) for index in range(half * half)]
+        for core in cores:
+            area.create_link(area.central_node, core)
+        for pod in range(k):
+            aggregations = [node("Agg", pod * half + index) for index in range(half)]
+            edges = [node("Edge", pod * half + index) for index in range(half)]
+            for position, aggregation in enumerate(aggregations):
+                for core in cores[position * half : (position + 1) * half]:
+                    area.create_link(aggregation, core)
+                for edge in edges:
+                    area.create_link(aggregation, edge)
+            for position, edge in enumerate(edges):
+                for host in range(half):
+                    area.create_link(edge, node("Host", (pod * half + position) * half + host, "Standard"))
+        return area
+
+    def build_random(
+        self,
+        name: str,
+        count: int,
+        average_degree: float = 3,
+        seed: Optional[int] = None,
+        pattern: str = "{area}{index}",
+    ) -> TopologyArea:
+        area = self.create_area(name)
+        generator = random.Random(seed)
+        nodes = [area.create_node(pattern.format(area=name, index=index), False, "Switch") for index in range(count)]
+        if not nodes:
+            return area
+        area.create_link(area.central_node, nodes[0])
+        # Random spanning tree first so the area stays connected
+        for index in range(1, count):
+            area.create_link(nodes[generator.randrange(index)], nodes[index])
+        max_links = count * (count - 1) // 2
+        extra_links = min(max(0, int(count * average_degree / 2)), max_links) - (count - 1)
+        attempts = 0
+        while extra_links > 0 and attempts < 10 * (extra_links + count):
+            attempts += 1
+            source, target = generator.sample(nodes, 2)
+            if area.has_link(source, target):
+                continue
+            area.create_link(source, target)
+            extra_links -= 1
+        return area
+
+    def connect_areas(
+        self,
+        areas: List[TopologyArea],
+        fabric: str = "ring",
+        create_medium_node: bool = True,
+        extra_links: int = 0,
+        seed: Optional[int] = None,
+    ) -> int:
+        pairs = []
+        if fabric == "chain" or fabric == "ring":
+            pairs = list(zip(areas, areas[1:]))
+            if fabric == "ring" and len(areas) > 2:
+                pairs.append((areas[-1], areas[0]))
+        elif fabric == "star":
+            pairs = [(areas[0], area) for area in areas[1:]]
+        elif fabric == "mesh":
+            pairs = [(source, target) for index, source in enumerate(areas) for target in areas[index + 1 :]]
+        elif fabric == "random":
+            generator = random.Random(seed)
+            pairs = [(areas[generator.randrange(index)], areas[index]) for index in range(1, len(areas))]
+            for _ in range(extra_links):
+                if len(areas) > 1:
+                    pairs.append(tuple(generator.sample(areas, 2)))
+        else:
+            raise ValueError(f"Unknown fabric {fabric}")
+        return sum(
+            1 for source, target in pairs if self.create_link(source, target, create_medium_node=create_medium_node)
+        )
+
+    @classmethod
+    def star_chain(cls, area_count: int, area_size: int = STAR_CHAIN_AREA_SIZE) -> "GlobalTopology":
+        # Star areas joined in a chain, the topology the tests and deploy benchmark share
+        topology = cls()
+        areas = [topology.build_star(f"A{index}", area_size) for index in range(area_count)]
+        topology.connect_areas(areas, "chain")
+        return topology
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "GlobalTopology":
+        topology = cls()
+        nodes: Dict[str, TopologyNode] = {}
+        edges: List[Tuple[str, str]] = []
+        medium_sources: Dict[str, str] = {}
+        area_links: List[Tuple[str, str, bool]] = []
+        for record in records:
+            if record["type"] == "area":
+                area = topology.create_area(record["name"])
+                nodes[area.central_node.name] = area.central_node
+            elif record["type"] == "node":
+                area = topology.get_area(record["area"])
+                type_ = "Switch" if record.get("kind") == "switch" else "Standard"
+                node = area.create_node(record["name"][len(area.name) + 1 :], False, type_)
+                nodes[node.name] = node
+                edges.extend((node.name, neighbor) for neighbor in record["neighbors"])
+            elif record["type"] == "area_link":
+                if record["source"] in medium_sources:
+                    area_links.append((medium_sources.pop(record["source"]), record["target"], True))
+                elif record["target"].startswith("Medium-"):
+                    medium_sources[record["target"]] = record["source"]
+                else:
+                    area_links.append((record["source"], record["target"], False))
+
+        for source, target in edges:
+            source_node, target_node = nodes[source], nodes[target]
+            if not source_node.area.has_link(source_node, target_node):
+                source_node.area.create_link(source_node, target_node)
+        for source, target, medium in area_links:
+            source_node, target_node = nodes[source], nodes[target]
+            topology.create_link(source_node.area, target_node.area, source_node, target_node, medium)
+        return topology
+
+    def to_compact(self) -> CompactTopology:
+        return CompactTopology.from_topology(self)
+
+    @classmethod
+    def from_compact(cls, compact: CompactTopology) -> "GlobalTopology":
+        topology = cls()
+        for area_name in compact.area_names:
+            topology.create_area(area_name)
+
+        nodes: List[TopologyNode] = []
+        for node_id, name in enumerate(compact.names):
+            area = topology.get_area(compact.area_names[compact.node_area[node_id]])
+            if compact.node_kind[node_id] == CompactTopology.KINDS.index("router"):
+                nodes.append(None)
+            elif name == area.central_node.name:
+                nodes.append(area.central_node)
+            else:
+                type_ = "Switch" if compact.node_kind[node_id] == CompactTopology.KINDS.index("switch") else "Standard"
+                node = TopologyNode(name[len(area.name) + 1 :], area, type_)
+                area.add_node(node)
+                nodes.append(node)
+
+        for source, target in zip(compact.edge_source, compact.edge_target):
+            nodes[source].area.create_link(nodes[source], nodes[target])
+
+        for source, target, medium in zip(
+            compact.area_link_source, compact.area_link_target, compact.area_link_medium
+        ):
+            source_node, target_node = nodes[source], nodes[target]
+            topology.create_link(
+                source_node.area, target_node.area, source_node, target_node, create_medium_node=medium >= 0
+            )
+        return topology
+
+    def deploy_nodes(self) -> List[Tuple[str, str, str]]:
+        nodes = []
+        for area in self.areas:
+            for node in area.nodes:
+                nodes.append((node.name, node.kind, area.name))
+            nodes.append((area.central_node.name, "switch", area.name))
         for link in self.links:
-            if link.source_area.name == area.name:
-                area_links.append(link)
-        return area_links
+            if link.medium_node:
+                nodes.append((link.medium_node.name, "router", link.source_area.name))
+        return nodes
+
+    def deploy_links(self) -> List[Tuple[str, str]]:
+        links = []
+        for area in self.areas:
+            for link in area.links:
+                links.append((link.source.name, link.target.name))
+        for area_link in self.links:
+            if area_link.medium_node:
+                links.append((area_link.source_node.name, area_link.medium_node.name))
+                links.append((area_link.medium_node.name, area_link.target_node.name))
+            else:
+                links.append((area_link.source_node.name, area_link.target_node.name))
+        return links
+
+    def layout(self, mode: str = "grid", node_spacing: int = 80) -> Dict[str, Tuple[int, int]]:
+        from layout import layout_topology
+
+        return layout_topology(self, mode, node_spacing)
 
     def to_json(self):
         final_dict = {}
         for area in self.areas:
             for node in area.nodes:
                 node_neighbors = area.get_neighbors(node)
-                final_dict.setdefault(area.name, {})[node.name] = set(map(lambda node: node.name, node_neighbors))
+                final_dict.setdefault(area.name, {})[node.name] = list(map(lambda node: node.name, node_neighbors))
 
         final_dict["area_links"] = {}
         for area in self.areas:
@@ -210,53 +532,475 @@ class GlobalTopology:
 
 
 class TopologyGenerator:
-    def __init__(self) -> None:
-        self.graph = nx.Graph()
+    def show_from_dict(self, graph_dict, positions: Optional[Dict[str, Tuple[int, int]]] = None):
+        import networkx as nx
 
-    def show_from_dict(self, graph_dict):
         graph = nx.Graph()
         for area_name, area_dict in graph_dict.items():
             if area_name == "area_links":
                 continue
             for node_name, node_neighbors in area_dict.items():
-                graph.add_node(node_name)
+                graph.add_node(node_name, area=area_name)
                 for neighbor in node_neighbors:
                     graph.add_edge(node_name, neighbor)
+                    graph.nodes[neighbor].setdefault("area", area_name)
 
         for area_name, area_links in graph_dict["area_links"].items():
             for source_node, target_nodes in area_links.items():
                 for target_node in target_nodes:
                     graph.add_edge(source_node, target_node)
+                    graph.nodes[source_node].setdefault("area", area_name)
+
+        self._draw(graph, positions)
+
+    def show_from_stream(self, records: Iterable[Dict], positions: Optional[Dict[str, Tuple[int, int]]] = None):
+        import networkx as nx
+
+        graph = nx.Graph()
+        for record in records:
+            if record["type"] == "node":
+                graph.add_node(record["name"], area=record["area"])
+                for neighbor in record["neighbors"]:
+                    graph.add_edge(record["name"], neighbor)
+                    graph.nodes[neighbor].setdefault("area", record["area"])
+            elif record["type"] == "area_link":
+                graph.add_edge(record["source"], record["target"])
+                graph.nodes[record["source"]].setdefault("area", record["area"])
+
+        self._draw(graph, positions)
+
+    def _draw(self, graph, positions: Optional[Dict[str, Tuple[int, int]]] = None):
+        import matplotlib.pyplot as plt
+        import networkx as nx
 
         color_save = {}
         colors = []
-        for node in graph.nodes:
-            colors.append(color_save.setdefault(node[0], [random.random(), random.random(), random.random()]))
+        for node, area in graph.nodes(data="area", default=""):
+            colors.append(color_save.setdefault(area, [random.random(), random.random(), random.random()]))
+
+        if positions is not None and all(node in positions for node in graph.nodes):
+            # GNS3 y axis points down
+            positions = {node: (x, -y) for node, (x, y) in positions.items()}
+        else:
+            positions = None
 
         plt.figure(figsize=(10, 10))
-        nx.draw(graph, node_color=colors, with_labels=True, font_size=18, width=2, node_size=800)
+        nx.draw(graph, pos=positions, node_color=colors, with_labels=True, font_size=18, width=2, node_size=800)
         plt.show()
 
-    def deploy(self, interface: HyperInterface, topology: GlobalTopology):
-        for area in topology.areas:
-            for node in area.nodes:
-                print(node)
-                interface.create_vpcs(node.name)
-            interface.create_switch(area.central_node.name)
+    def deploy(
+        self,
+        interface: HyperInterface,
+        topology: GlobalTopology,
+        workers: int = 1,
+        metrics_path: Optional[str] = None,
+        scheduler: Optional[ComputeScheduler] = None,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        journal: Optional[DeployJournal] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        cascade: bool = False,
+    ) -> Dict[str, float]:
+        if budgets is None:
+            budgets = port_budgets(interface.connector.get_templates().templates)
+        self.plan_capacity(topology, budgets, cascade, positions)
+        nodes = topology.deploy_nodes()
+        links = topology.deploy_links()
+        if journal is not None:
+            nodes, links = self._resume_journal(interface, journal, topology_hash(topology, positions), nodes, links)
+        if workers <= 1:
+            timings = self._deploy_sequential(interface, nodes, links, scheduler, positions, journal)
+        else:
+            timings = self._deploy_parallel(interface, nodes, links, workers, scheduler, positions, journal)
+        self.print_timings(timings)
+        if scheduler:
+            print("\n".join(scheduler.summary()))
+        if journal is not None:
+            print("\n".join(journal.summary()))
+        self.report_metrics(interface.connector.metrics, metrics_path)
+        return timings
 
-        for medium_node in topology.medium_nodes:
-            interface.create_router(medium_node.name)
+    @staticmethod
+    def plan_capacity(
+        topology: GlobalTopology,
+        budgets: Optional[Dict[str, int]] = None,
+        cascade: bool = False,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+    ) -> CapacityReport:
+        # Runs before anything is created: a node with more links than ports would
+        # otherwise only fail at link time, once every node is already deployed
+        budgets = budgets or port_budgets()
+        if cascade:
+            added = cascade_topology(topology, budgets)
+            if added:
+                print(f"Cascaded oversubscribed nodes behind {len(added)} switches")
+                if positions is not None:
+                    place_cascades(added, positions)
+        report = check_capacity(topology.deploy_nodes(), topology.deploy_links(), budgets)
+        if not report.is_ok():
+            hint = "" if cascade else "\nRerun with --cascade to move their area links behind extra switches"
+            raise ValueError(f"{report}{hint}")
+        return report
 
-        for area in topology.areas:
-            for link in area.links:
-                interface.create_link(link.source.name, link.target.name)
+    @staticmethod
+    def _resume_journal(
+        interface: HyperInterface,
+        journal: DeployJournal,
+        digest: str,
+        nodes: List[Tuple[str, str, str]],
+        links: List[Tuple[str, str]],
+    ) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+        journal.begin(digest, nodes, links)
+        if journal.resume:
+            connector = interface.connector
+            project_nodes = connector.get_nodes(connector.project_id, fields=("name", "node_id"))
+            names = {node.node_id: node.name for node in project_nodes}
+            project_links = {
+                link_key(*(names.get(link_node.node_id, "") for link_node in link.nodes)): link.link_id
+                for link in connector.get_all_links(connector.project_id).links
+                if len(link.nodes) == 2
+            }
+            adopted = journal.adopt({node.name: node.node_id for node in project_nodes}, project_links)
+            if adopted:
+                print(f"Adopted {adopted} operations the project already holds")
+        remaining_nodes, remaining_links = journal.remaining(nodes, links)
+        print(
+            f"Journal: {len(nodes) - len(remaining_nodes)}/{len(nodes)} nodes and "
+            f"{len(links) - len(remaining_links)}/{len(links)} links already deployed"
+        )
+        return remaining_nodes, remaining_links
 
-        for area_link in topology.links:
-            if area_link.medium_node:
-                interface.create_link(area_link.source_node.name, area_link.medium_node.name)
-                interface.create_link(area_link.medium_node.name, area_link.target_node.name)
+    def deploy_cached(
+        self,
+        interface: HyperInterface,
+        topology: GlobalTopology,
+        cache: SnapshotCache,
+        workers: int = 1,
+        metrics_path: Optional[str] = None,
+        scheduler: Optional[ComputeScheduler] = None,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        cascade: bool = False,
+        wipe: bool = False,
+    ) -> Dict[str, float]:
+        start = time.perf_counter()
+        # Restoring or snapshotting replaces the whole project, so never take nodes we did not create without asking
+        connector = interface.connector
+        existing = len(connector.get_nodes(connector.project_id, fields=("node_id",)))
+        if existing and not wipe:
+            raise ValueError(
+                f"Project already holds {existing} nodes and the snapshot cache replaces all of them, "
+                "deploy into an empty project or pass --wipe"
+            )
+        digest = topology_hash(topology, positions)
+        if cache.restore(digest):
+            interface.port_allocator = None
+            print(f"Restored snapshot {cache.snapshot_name(digest)}")
+            timings = {"restore": time.perf_counter() - start, "total": time.perf_counter() - start}
+            self.print_timings(timings)
+            return timings
+
+        if budgets is None:
+            budgets = port_budgets(interface.connector.get_templates().templates)
+        self.plan_capacity(topology, budgets, cascade, positions)
+        # The snapshot must hold exactly this topology, so start from an empty project
+        if existing:
+            interface.teardown(workers=max(1, workers))
+        timings = self.deploy(interface, topology, workers, metrics_path, scheduler, positions, budgets=budgets)
+        node_count = len(connector.get_nodes(connector.project_id, fields=("node_id",)))
+        link_count = len(connector.get_all_links(connector.project_id).links)
+        expected_nodes, expected_links = len(topology.deploy_nodes()), len(topology.deploy_links())
+        if node_count == expected_nodes and link_count == expected_links:
+            cache.store(digest)
+        else:
+            print(
+                f"Warning: deploy incomplete ({node_count}/{expected_nodes} nodes, "
+                f"{link_count}/{expected_links} links), not snapshotting it"
+            )
+        timings["total"] = time.perf_counter() - start
+        return timings
+
+    def _deploy_sequential(
+        self,
+        interface: HyperInterface,
+        nodes: List[Tuple[str, str, str]],
+        links: List[Tuple[str, str]],
+        scheduler: Optional[ComputeScheduler] = None,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        journal: Optional[DeployJournal] = None,
+    ) -> Dict[str, float]:
+        positions = positions or {}
+        start = time.perf_counter()
+        for name, kind, area in nodes:
+            print(name)
+            try:
+                compute_id = scheduler.place(name, area) if scheduler else None
+                journaled(journal, node_operation(name), interface.create, kind, name, compute_id, positions.get(name))
+            except Exception as e:
+                print(e)
+        nodes_done = time.perf_counter()
+
+        for source, target in links:
+            try:
+                journaled(journal, link_operation(source, target), interface.create_link, source, target)
+            except Exception as e:
+                print(f"Link {source}-{target} failed: {e}")
+        links_done = time.perf_counter()
+
+        return {"nodes": nodes_done - start, "links": links_done - nodes_done, "total": links_done - start}
+
+    def _deploy_parallel(
+        self,
+        interface: HyperInterface,
+        nodes: List[Tuple[str, str, str]],
+        links: List[Tuple[str, str]],
+        workers: int,
+        scheduler: Optional[ComputeScheduler] = None,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        journal: Optional[DeployJournal] = None,
+    ) -> Dict[str, float]:
+        positions = positions or {}
+        interface.connector.set_pool_size(workers)
+        interface.get_port_allocator()
+
+        created_names = {name for name, _, _ in nodes}
+        pending: Dict[int, int] = {}
+        links_by_node: Dict[str, List[int]] = {}
+        ready: List[int] = []
+        for index, (source, target) in enumerate(links):
+            endpoints = {source, target} & created_names
+            pending[index] = len(endpoints)
+            if not endpoints:
+                ready.append(index)
+            for endpoint in endpoints:
+                links_by_node.setdefault(endpoint, []).append(index)
+
+        link_futures: Dict[Future, int] = {}
+
+        def create_node(kind: str, name: str, area: str):
+            # Placed when a worker picks the node up, so areas reached later see re-polled load
+            compute_id = scheduler.place(name, area) if scheduler else None
+            return interface.create(kind, name, compute_id, positions.get(name))
+
+        def submit_link(index: int) -> None:
+            source, target = links[index]
+            future = executor.submit(
+                journaled, journal, link_operation(source, target), interface.create_link, source, target
+            )
+            link_futures[future] = index
+
+        start = time.perf_counter()
+        first_link = start if ready else None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index in ready:
+                submit_link(index)
+            node_futures = {
+                executor.submit(journaled, journal, node_operation(name), create_node, kind, name, area): name
+                for name, kind, area in nodes
+            }
+            for future in as_completed(node_futures):
+                name = node_futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Node {name} failed: {e}")
+                    continue
+                for index in links_by_node.get(name, []):
+                    pending[index] -= 1
+                    if pending[index] == 0:
+                        if first_link is None:
+                            first_link = time.perf_counter()
+                        submit_link(index)
+            nodes_done = time.perf_counter()
+
+            for future in as_completed(link_futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    source, target = links[link_futures[future]]
+                    print(f"Link {source}-{target} failed: {e}")
+        links_done = time.perf_counter()
+
+        skipped = sum(1 for count in pending.values() if count > 0)
+        if skipped:
+            print(f"Skipped {skipped} links whose endpoints could not be created")
+        links_start = first_link if first_link is not None else nodes_done
+        return {"nodes": nodes_done - start, "links": links_done - links_start, "total": links_done - start}
+
+    def deploy_file(
+        self,
+        interface: HyperInterface,
+        topology: GlobalTopology,
+        directory: str,
+        project_name: str,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+    ) -> Dict[str, float]:
+        start = time.perf_counter()
+        project = build_project(topology.deploy_nodes(), topology.deploy_links(), project_name, positions=positions)
+        path = write_project(project, directory)
+        written = time.perf_counter()
+
+        connector = interface.connector
+        connector.project_id = connector.load_project_file(path).project_id
+        interface.port_allocator = None
+        loaded = time.perf_counter()
+
+        timings = {"compile": written - start, "load": loaded - written, "total": loaded - start}
+        self.print_timings(timings)
+        return timings
+
+    def reconcile(
+        self, interface: HyperInterface, topology: GlobalTopology, delete_extra: bool = True, workers: int = 1
+    ) -> ReconcilePlan:
+        connector = interface.connector
+        nodes = connector.get_nodes(connector.project_id, fields=PORT_FIELDS)
+        links = connector.get_all_links(connector.project_id).links
+        plan = diff_project(topology.deploy_nodes(), topology.deploy_links(), nodes, links, delete_extra)
+        print(f"Reconcile plan: {plan}")
+        if plan.is_empty():
+            return plan
+
+        interface.port_allocator = PortAllocator.from_project(nodes, links)
+        for link in plan.links_to_delete:
+            interface.delete_link(link.link_id)
+        for node in plan.nodes_to_delete:
+            interface.delete_node(node)
+
+        if workers <= 1:
+            timings = self._deploy_sequential(interface, plan.nodes_to_create, plan.links_to_create)
+        else:
+            timings = self._deploy_parallel(interface, plan.nodes_to_create, plan.links_to_create, workers)
+        self.print_timings(timings)
+        return plan
+
+    def deploy_sharded(
+        self,
+        shard_map: ShardMap,
+        interfaces: Dict[str, HyperInterface],
+        workers: int = 1,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        missing = set(shard_map.shards) - set(interfaces)
+        if missing:
+            raise ValueError(f"No interface for shards {', '.join(sorted(missing))}")
+        print(shard_map)
+
+        def deploy_shard(shard: Shard) -> Dict[str, float]:
+            interface = interfaces[shard.name]
+            start = time.perf_counter()
+            for tunnel in shard.tunnels:
+                interface.create_cloud(tunnel.name, tunnel.ports_mapping())
+            tunnels_done = time.perf_counter()
+            if workers <= 1:
+                timings = self._deploy_sequential(interface, shard.nodes, shard.links, positions=positions)
             else:
-                interface.create_link(area_link.source_node.name, area_link.target_node.name)
+                timings = self._deploy_parallel(interface, shard.nodes, shard.links, workers, positions=positions)
+            timings["tunnels"] = tunnels_done - start
+            timings["total"] = time.perf_counter() - start
+            return timings
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(shard_map.shards)) as executor:
+            futures = {name: executor.submit(deploy_shard, shard) for name, shard in shard_map.shards.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        total = time.perf_counter() - start
+
+        for name, timings in results.items():
+            print(f"[{name}]")
+            self.print_timings(timings)
+        print(f"total: {total:.2f}s")
+        return results
+
+    async def deploy_async(
+        self,
+        interface: "AsyncHyperInterface",
+        topology: GlobalTopology,
+        scheduler: Optional[ComputeScheduler] = None,
+        positions: Optional[Dict[str, Tuple[int, int]]] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        cascade: bool = False,
+    ) -> Dict[str, float]:
+        if budgets is None:
+            budgets = port_budgets((await interface.connector.get_templates()).templates)
+        self.plan_capacity(topology, budgets, cascade, positions)
+        positions = positions or {}
+        nodes = topology.deploy_nodes()
+        links = topology.deploy_links()
+        await interface.get_port_allocator()
+        # At most max_concurrency node creations in flight, each placed when it gets its slot,
+        # so areas dispatched later in the deploy see re-polled compute load
+        dispatch = asyncio.Semaphore(interface.connector.max_concurrency)
+        refreshing = asyncio.Lock()
+
+        async def place_and_create(kind: str, name: str, area: str):
+            async with dispatch:
+                compute_id = None
+                if scheduler:
+                    async with refreshing:
+                        if scheduler.needs_refresh():
+                            scheduler.update((await interface.connector.get_computes()).computes)
+                    compute_id = scheduler.place(name, area)
+                return await interface.create(kind, name, compute_id, positions.get(name))
+
+        start = time.perf_counter()
+        node_tasks = {name: asyncio.ensure_future(place_and_create(kind, name, area)) for name, kind, area in nodes}
+        phase_ends = {"nodes": start, "links": start}
+
+        async def create_node(name: str):
+            try:
+                await node_tasks[name]
+            finally:
+                phase_ends["nodes"] = max(phase_ends["nodes"], time.perf_counter())
+
+        async def create_link(source: str, target: str):
+            await asyncio.gather(node_tasks[source], node_tasks[target])
+            await interface.create_link(source, target)
+            phase_ends["links"] = max(phase_ends["links"], time.perf_counter())
+
+        results = await asyncio.gather(
+            *(create_node(name) for name in node_tasks),
+            *(create_link(source, target) for source, target in links),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(result)
+        end = time.perf_counter()
+
+        timings = {"nodes": phase_ends["nodes"] - start, "links": phase_ends["links"] - start, "total": end - start}
+        self.print_timings(timings)
+        return timings
+
+    def deploy_plan(
+        self, interface: HyperInterface, plan: DeployPlan, workers: int = 1, metrics_path: Optional[str] = None
+    ) -> Dict[str, float]:
+        connector = interface.connector
+        plan.check_target(node.name for node in connector.get_nodes(connector.project_id, fields=("name",)))
+        executor = SequentialExecutor(interface) if workers <= 1 else ThreadedExecutor(interface, workers)
+        timings = executor.run(plan)
+        self.print_timings(timings)
+        print("\n".join(executor.report()))
+        self.report_metrics(interface.connector.metrics, metrics_path)
+        return timings
+
+    async def deploy_plan_async(self, interface: "AsyncHyperInterface", plan: DeployPlan) -> Dict[str, float]:
+        connector = interface.connector
+        plan.check_target(node.name for node in await connector.get_nodes(connector.project_id, fields=("name",)))
+        executor = AsyncExecutor(interface)
+        timings = await executor.run(plan)
+        self.print_timings(timings)
+        print("\n".join(executor.report()))
+        return timings
+
+    @staticmethod
+    def report_metrics(metrics: RequestMetrics, metrics_path: Optional[str] = None):
+        print(metrics.summary())
+        if metrics_path:
+            metrics.dump(metrics_path)
+
+    @staticmethod
+    def print_timings(timings: Dict[str, float]):
+        for phase, duration in timings.items():
+            print(f"{phase}: {duration:.2f}s")
 
 
 def main():
@@ -295,10 +1039,10 @@ def main():
     topo.create_link(area_a, area_c)
     topo.create_link(area_b, area_c, create_medium_node=False)
 
-    connector = GNS3Connector("http://localhost:3080", "gns3", "gns3")
+    connector = GNS3Connector("http://localhost:3080", "gns3", "gns3", use_cache=True)
     interface = HyperInterface(connector)
 
-    TopologyGenerator().deploy(interface, topo)
+    TopologyGenerator().deploy(interface, topo, workers=8, positions=topo.layout())
 
     return
 
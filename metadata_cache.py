@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "projects": 30.0,
+    "computes": 10.0,
+    "templates": 300.0,
+    "version": 3600.0,
+    "appliances": 3600.0,
+}
+
+
+def endpoint_group(endpoint: str) -> str:
+    # Keys are the server URL followed by the endpoint, so one cache file can serve several servers
+    if "://" in endpoint:
+        endpoint = urlsplit(endpoint).path
+    segments = endpoint.strip("/").split("/")
+    return segments[1] if len(segments) > 1 else segments[0]
+
+
+class MetadataCache:
+    def __init__(
+        self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 256, path: Optional[str] = None
+    ) -> None:
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        if path:
+            self.load()
+
+    def is_cacheable(self, endpoint: str) -> bool:
+        return self.ttls.get(endpoint_group(endpoint), 0) > 0
+
+    def get(self, endpoint: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._entries[endpoint]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(endpoint)
+            self.hits += 1
+            return data
+
+    def set(self, endpoint: str, data: Any) -> None:
+        ttl = self.ttls.get(endpoint_group(endpoint), 0)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[endpoint] = (time.time() + ttl, data)
+            self._entries.move_to_end(endpoint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.path:
+            self.save()
+
+    def invalidate(self, endpoint: Optional[str] = None, group: Optional[str] = None) -> None:
+        with self._lock:
+            if endpoint is None and group is None:
+                self._entries.clear()
+            else:
+                for key in list(self._entries):
+                    if key == endpoint or (group is not None and endpoint_group(key) == group):
+                        del self._entries[key]
+        if self.path:
+            self.save()
+
+    def save(self) -> None:
+        # Under the lock so the file always ends up with the latest entries, through a temporary file of
+        # our own so another process saving the same cache cannot overwrite it halfway
+        with self._lock:
+            now = time.time()
+            entries = [
+                [key, expires_at, data] for key, (expires_at, data) in self._entries.items() if expires_at >= now
+            ]
+            descriptor, temporary_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.path)), prefix=os.path.basename(self.path), suffix=".tmp"
+            )
+            try:
+                with os.fdopen(descriptor, "w") as cache_file:
+                    json.dump(entries, cache_file)
+                os.replace(temporary_path, self.path)
+            except BaseException:
+                os.unlink(temporary_path)
+                raise
+
+    def load(self) -> None:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path) as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable metadata cache {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires_at, data in entries:
+                if expires_at >= now:
+                    self._entries[key] = (expires_at, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
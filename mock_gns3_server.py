@@ -0,0 +1,605 @@
+import copy
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PORT_COUNTS = {"vpcs": 1, "ethernet_switch": 8, "ethernet_hub": 8, "cloud": 1}
+
+ROUTES: List[Tuple[str, "re.Pattern"]] = [
+    (name, re.compile(pattern))
+    for name, pattern in (
+        ("projects", r"/v2/projects"),
+        ("load_project", r"/v2/projects/load"),
+        ("project", r"/v2/projects/(?P<project_id>[^/]+)"),
+        ("notifications", r"/v2/projects/(?P<project_id>[^/]+)/notifications"),
+        ("nodes", r"/v2/projects/(?P<project_id>[^/]+)/nodes"),
+        ("nodes_start", r"/v2/projects/(?P<project_id>[^/]+)/nodes/start"),
+        ("nodes_stop", r"/v2/projects/(?P<project_id>[^/]+)/nodes/stop"),
+        ("node", r"/v2/projects/(?P<project_id>[^/]+)/nodes/(?P<node_id>[^/]+)"),
+        ("node_start", r"/v2/projects/(?P<project_id>[^/]+)/nodes/(?P<node_id>[^/]+)/start"),
+        ("node_stop", r"/v2/projects/(?P<project_id>[^/]+)/nodes/(?P<node_id>[^/]+)/stop"),
+        ("links", r"/v2/projects/(?P<project_id>[^/]+)/links"),
+        ("snapshots", r"/v2/projects/(?P<project_id>[^/]+)/snapshots"),
+        ("snapshot", r"/v2/projects/(?P<project_id>[^/]+)/snapshots/(?P<snapshot_id>[^/]+)"),
+        ("snapshot_restore", r"/v2/projects/(?P<project_id>[^/]+)/snapshots/(?P<snapshot_id>[^/]+)/restore"),
+        ("link", r"/v2/projects/(?P<project_id>[^/]+)/links/(?P<link_id>[^/]+)"),
+        ("computes", r"/v2/computes"),
+        ("compute", r"/v2/computes/(?P<compute_id>[^/]+)"),
+        ("templates", r"/v2/templates"),
+        ("template", r"/v2/templates/(?P<template_id>[^/]+)"),
+        ("version", r"/v2/version"),
+        ("appliances", r"/v2/appliances"),
+    )
+]
+NOTIFICATIONS_ROUTE = dict(ROUTES)["notifications"]
+
+
+class MockProject:
+    def __init__(self, name: str, path: str, project_id: Optional[str] = None) -> None:
+        self.project_id = project_id or str(uuid.uuid4())
+        self.name = name
+        self.path = path
+        self.status = "closed"
+        self.nodes: Dict[str, Dict] = {}
+        self.links: Dict[str, Dict] = {}
+        self.used_ports: Dict[Tuple[str, int, int], str] = {}
+        self.snapshots: Dict[str, Dict] = {}
+        self.events: List[Dict] = []
+        self.subscribers: List["queue.Queue[Optional[Dict]]"] = []
+
+    def to_json(self) -> Dict:
+        return {
+            "project_id": self.project_id,
+            "name": self.name,
+            "status": self.status,
+            "path": self.path,
+            "auto_close": True,
+            "scene_height": 1000,
+            "scene_width": 2000,
+            "show_grid": False,
+            "show_interface_labels": False,
+            "show_layers": False,
+            "snap_to_grid": False,
+            "supplier": None,
+            "zoom": 1.0,
+        }
+
+    def load_response(self) -> Dict:
+        return {
+            "project_id": self.project_id,
+            "name": self.name,
+            "path": self.path,
+            "filename": f"{self.name}.gns3",
+            "auto_close": True,
+            "auto_open": False,
+            "auto_start": False,
+            "drawing_grid_size": 25,
+            "grid_size": 75,
+            "scene_width": 2000,
+            "scene_height": 1000,
+            "show_grid": False,
+            "show_interface_labels": False,
+            "show_layers": False,
+            "snap_to_grid": False,
+            "status": self.status,
+            "supplier": None,
+            "variables": None,
+            "zoom": 100,
+        }
+
+
+def make_node(project_id: str, request: Dict) -> Dict:
+    node_type = request["node_type"]
+    properties = request.get("properties") or {}
+    if "ports_mapping" in properties:
+        port_numbers = [port["port_number"] for port in properties["ports_mapping"]]
+    else:
+        port_numbers = list(range(DEFAULT_PORT_COUNTS.get(node_type, 1)))
+    return {
+        "command_line": None,
+        "compute_id": request.get("compute_id") or "local",
+        "console": None,
+        "console_auto_start": False,
+        "console_host": "127.0.0.1",
+        "console_type": "telnet" if node_type == "vpcs" else "none",
+        "custom_adapters": [],
+        "first_port_name": None,
+        "height": 59,
+        "label": {"rotation": 0, "style": None, "text": request["name"], "x": 0, "y": -25},
+        "locked": False,
+        "name": request["name"],
+        "node_directory": None,
+        "node_id": request.get("node_id") or str(uuid.uuid4()),
+        "node_type": node_type,
+        "port_name_format": "Ethernet{0}",
+        "port_segment_size": 0,
+        "ports": [
+            {
+                "adapter_number": 0,
+                "data_link_types": {"Ethernet": "DLT_EN10MB"},
+                "link_type": "ethernet",
+                "name": f"Ethernet{port_number}",
+                "port_number": port_number,
+                "short_name": f"e{port_number}",
+            }
+            for port_number in port_numbers
+        ],
+        "project_id": project_id,
+        "properties": properties,
+        "status": "stopped",
+        "symbol": request.get("symbol"),
+        "template_id": None,
+        "width": 65,
+        "x": request.get("x", 0),
+        "y": request.get("y", 0),
+        "z": request.get("z", 1),
+    }
+
+
+class MockGNS3Server:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        project_names: Tuple[str, ...] = ("untitled",),
+        computes: Optional[List[Dict]] = None,
+        ping_interval: float = 1.0,
+    ) -> None:
+        self.latency = latency
+        self.ping_interval = ping_interval
+        self.lock = threading.RLock()
+        self.projects: Dict[str, MockProject] = {}
+        for name in project_names:
+            self.add_project(name)
+        self.computes: List[Dict] = computes or [self.make_compute("local")]
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.endpoint_counts: Dict[str, int] = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def make_compute(compute_id: str, cpu: float = 0.0, memory: float = 0.0, connected: bool = True) -> Dict:
+        return {
+            "capabilities": {"node_types": ["vpcs", "ethernet_switch", "cloud"]},
+            "compute_id": compute_id,
+            "connected": connected,
+            "cpu_usage_percent": cpu,
+            "host": "127.0.0.1",
+            "last_error": None,
+            "memory_usage_percent": memory,
+            "name": compute_id,
+            "port": 3080,
+            "protocol": "http",
+            "user": None,
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_project(self, name: str, path: Optional[str] = None) -> MockProject:
+        project = MockProject(name, path or f"/mock/projects/{name}")
+        self.projects[project.project_id] = project
+        return project
+
+    def start(self) -> "MockGNS3Server":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        with self.lock:
+            for project in self.projects.values():
+                for subscriber in project.subscribers:
+                    subscriber.put(None)
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockGNS3Server":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.endpoint_counts = {}
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "requests": self.request_count,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "endpoints": dict(self.endpoint_counts),
+            }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if server.latency:
+                    time.sleep(server.latency)
+                path = self.path.split("?")[0]
+                if self.command == "GET" and NOTIFICATIONS_ROUTE.fullmatch(path):
+                    return server.stream_notifications(self, NOTIFICATIONS_ROUTE.fullmatch(path)["project_id"])
+                status, data = server.dispatch(self.command, path, json.loads(body) if body else None)
+                payload = json.dumps(data).encode() if data is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                with server.lock:
+                    server.bytes_received += length
+                    server.bytes_sent += len(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        return Handler
+
+    # Notifications
+    def publish(self, project: MockProject, action: str, event: Dict) -> None:
+        notification = {"action": action, "event": copy.deepcopy(event)}
+        with self.lock:
+            project.events.append(notification)
+            for subscriber in project.subscribers:
+                subscriber.put(notification)
+
+    def events(self, project_id: str) -> List[Dict]:
+        with self.lock:
+            return list(self._project(project_id).events)
+
+    def replay(self, project_id: str, notifications: List[Dict]) -> None:
+        # Applies recorded notifications as if someone edited the project in the GUI,
+        # publishing each one to the subscribed streams
+        with self.lock:
+            project = self._project(project_id)
+            for notification in notifications:
+                action, event = notification["action"], notification["event"]
+                if action in ("node.created", "node.updated"):
+                    project.nodes[event["node_id"]] = copy.deepcopy(event)
+                    self.publish(project, action, event)
+                elif action == "node.deleted":
+                    self._delete_node(None, project_id, event["node_id"])
+                elif action == "link.created":
+                    self._add_link(project, event["nodes"], event["link_id"])
+                elif action == "link.deleted":
+                    self._remove_link(project, event["link_id"])
+
+    def stream_notifications(self, handler, project_id: str) -> None:
+        # Chunked JSON lines, one notification per chunk, with a ping whenever the
+        # project has been quiet for ping_interval
+        with self.lock:
+            self.request_count += 1
+            self.endpoint_counts["GET notifications"] = self.endpoint_counts.get("GET notifications", 0) + 1
+            project = self.projects.get(project_id)
+            subscriber: "queue.Queue[Optional[Dict]]" = queue.Queue()
+            if project is not None:
+                project.subscribers.append(subscriber)
+        handler.close_connection = True
+        if project is None:
+            status, data = self._not_found(f"Project {project_id}")
+            payload = json.dumps(data).encode()
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.send_header("Connection", "close")
+            handler.end_headers()
+            while not self._stopping.is_set():
+                try:
+                    notification = subscriber.get(timeout=self.ping_interval)
+                except queue.Empty:
+                    notification = {"action": "ping", "event": {"compute_id": "local", "cpu_usage_percent": 0.0}}
+                if notification is None:
+                    break
+                line = json.dumps(notification).encode() + b"\n"
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                with self.lock:
+                    self.bytes_sent += len(line)
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                project.subscribers.remove(subscriber)
+
+    def dispatch(self, method: str, path: str, body: Optional[Dict]) -> Tuple[int, Optional[Dict]]:
+        for name, pattern in ROUTES:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            with self.lock:
+                self.request_count += 1
+                key = f"{method} {name}"
+                self.endpoint_counts[key] = self.endpoint_counts.get(key, 0) + 1
+                handler = getattr(self, f"_{method.lower()}_{name}", None)
+                if handler is None:
+                    return 405, {"message": f"Method {method} not allowed", "status": 405}
+                try:
+                    return handler(body, **match.groupdict())
+                except KeyError as e:
+                    return self._not_found(f"Project {e}")
+        with self.lock:
+            self.request_count += 1
+        return 404, {"message": f"Unknown endpoint {path}", "status": 404}
+
+    def _project(self, project_id: str) -> MockProject:
+        project = self.projects.get(project_id)
+        if project is None:
+            raise KeyError(project_id)
+        return project
+
+    def _not_found(self, what: str) -> Tuple[int, Dict]:
+        return 404, {"message": f"{what} doesn't exist", "status": 404}
+
+    # Projects
+    def _get_projects(self, body):
+        return 200, [project.to_json() for project in self.projects.values()]
+
+    def _get_project(self, body, project_id):
+        project = self.projects.get(project_id)
+        return (200, project.to_json()) if project else self._not_found(f"Project {project_id}")
+
+    def _post_load_project(self, body):
+        path = body["path"]
+        if os.path.isfile(path):
+            with open(path) as project_file:
+                content = json.load(project_file)
+            project = MockProject(content["name"], os.path.dirname(path), content["project_id"])
+            for node in content["topology"]["nodes"]:
+                project.nodes[node["node_id"]] = make_node(project.project_id, node)
+            for link in content["topology"]["links"]:
+                self._add_link(project, link["nodes"], link["link_id"])
+            self.projects[project.project_id] = project
+        else:
+            project = next(
+                (project for project in self.projects.values() if f"{project.path}/{project.name}.gns3" == path), None
+            )
+            if project is None:
+                return self._not_found(f"Project file {path}")
+        project.status = "opened"
+        return 200, project.load_response()
+
+    # Nodes
+    def _get_nodes(self, body, project_id):
+        return 200, list(self._project(project_id).nodes.values())
+
+    def _post_nodes(self, body, project_id):
+        project = self._project(project_id)
+        node = make_node(project_id, body)
+        project.nodes[node["node_id"]] = node
+        self.publish(project, "node.created", node)
+        return 201, node
+
+    def _get_node(self, body, project_id, node_id):
+        node = self._project(project_id).nodes.get(node_id)
+        return (200, node) if node else self._not_found(f"Node {node_id}")
+
+    def _delete_node(self, body, project_id, node_id):
+        project = self._project(project_id)
+        node = project.nodes.pop(node_id, None)
+        if node is None:
+            return self._not_found(f"Node {node_id}")
+        for link_id in [
+            link_id
+            for link_id, link in project.links.items()
+            if any(link_node["node_id"] == node_id for link_node in link["nodes"])
+        ]:
+            self._remove_link(project, link_id)
+        self.publish(project, "node.deleted", node)
+        return 204, None
+
+    def _set_status(self, project_id, node_id, status):
+        project = self._project(project_id)
+        node = project.nodes.get(node_id)
+        if node is None:
+            return self._not_found(f"Node {node_id}")
+        node["status"] = status
+        self.publish(project, "node.updated", node)
+        return 200, node
+
+    def _post_node_start(self, body, project_id, node_id):
+        return self._set_status(project_id, node_id, "started")
+
+    def _post_node_stop(self, body, project_id, node_id):
+        return self._set_status(project_id, node_id, "stopped")
+
+    def _post_nodes_start(self, body, project_id):
+        for node_id in list(self._project(project_id).nodes):
+            self._set_status(project_id, node_id, "started")
+        return 204, None
+
+    def _post_nodes_stop(self, body, project_id):
+        for node_id in list(self._project(project_id).nodes):
+            self._set_status(project_id, node_id, "stopped")
+        return 204, None
+
+    # Links
+    def _add_link(self, project: MockProject, link_nodes: List[Dict], link_id: Optional[str] = None) -> Dict:
+        link = {
+            "link_id": link_id or str(uuid.uuid4()),
+            "project_id": project.project_id,
+            "nodes": [
+                {
+                    "node_id": link_node["node_id"],
+                    "adapter_number": link_node["adapter_number"],
+                    "port_number": link_node["port_number"],
+                }
+                for link_node in link_nodes
+            ],
+        }
+        project.links[link["link_id"]] = link
+        for link_node in link["nodes"]:
+            project.used_ports[(link_node["node_id"], link_node["adapter_number"], link_node["port_number"])] = link[
+                "link_id"
+            ]
+        self.publish(project, "link.created", link)
+        return link
+
+    def _remove_link(self, project: MockProject, link_id: str) -> Optional[Dict]:
+        link = project.links.pop(link_id, None)
+        if link:
+            for link_node in link["nodes"]:
+                project.used_ports.pop(
+                    (link_node["node_id"], link_node["adapter_number"], link_node["port_number"]), None
+                )
+            self.publish(project, "link.deleted", link)
+        return link
+
+    def _get_links(self, body, project_id):
+        return 200, list(self._project(project_id).links.values())
+
+    def _post_links(self, body, project_id):
+        project = self._project(project_id)
+        for link_node in body["nodes"]:
+            node = project.nodes.get(link_node["node_id"])
+            if node is None:
+                return self._not_found(f"Node {link_node['node_id']}")
+            port = (link_node["node_id"], link_node["adapter_number"], link_node["port_number"])
+            if not any(
+                candidate["adapter_number"] == port[1] and candidate["port_number"] == port[2]
+                for candidate in node["ports"]
+            ):
+                return 409, {"message": f"Port {port[1]}/{port[2]} doesn't exist on node {node['name']}", "status": 409}
+            if port in project.used_ports:
+                return 409, {"message": f"Port {port[1]}/{port[2]} is not free on node {node['name']}", "status": 409}
+        return 201, self._add_link(project, body["nodes"])
+
+    def _get_link(self, body, project_id, link_id):
+        link = self._project(project_id).links.get(link_id)
+        return (200, link) if link else self._not_found(f"Link {link_id}")
+
+    def _delete_link(self, body, project_id, link_id):
+        if self._remove_link(self._project(project_id), link_id) is None:
+            return self._not_found(f"Link {link_id}")
+        return 204, None
+
+    # Snapshots
+    def _get_snapshots(self, body, project_id):
+        return 200, [snapshot["info"] for snapshot in self._project(project_id).snapshots.values()]
+
+    def _post_snapshots(self, body, project_id):
+        project = self._project(project_id)
+        if any(snapshot["info"]["name"] == body["name"] for snapshot in project.snapshots.values()):
+            return 409, {"message": f"The snapshot {body['name']} already exists", "status": 409}
+        info = {
+            "snapshot_id": str(uuid.uuid4()),
+            "name": body["name"],
+            "created_at": int(time.time()),
+            "project_id": project_id,
+        }
+        project.snapshots[info["snapshot_id"]] = {
+            "info": info,
+            "state": copy.deepcopy((project.nodes, project.links, project.used_ports)),
+        }
+        return 201, info
+
+    def _delete_snapshot(self, body, project_id, snapshot_id):
+        if self._project(project_id).snapshots.pop(snapshot_id, None) is None:
+            return self._not_found(f"Snapshot {snapshot_id}")
+        return 204, None
+
+    def _post_snapshot_restore(self, body, project_id, snapshot_id):
+        project = self._project(project_id)
+        snapshot = project.snapshots.get(snapshot_id)
+        if snapshot is None:
+            return self._not_found(f"Snapshot {snapshot_id}")
+        nodes, links = project.nodes, project.links
+        project.nodes, project.links, project.used_ports = copy.deepcopy(snapshot["state"])
+        # Tell subscribers what the restore changed
+        for link_id, link in links.items():
+            if project.links.get(link_id) != link:
+                self.publish(project, "link.deleted", link)
+        for node_id, node in nodes.items():
+            if node_id not in project.nodes:
+                self.publish(project, "node.deleted", node)
+        for node_id, node in project.nodes.items():
+            if nodes.get(node_id) != node:
+                self.publish(project, "node.updated" if node_id in nodes else "node.created", node)
+        for link_id, link in project.links.items():
+            if links.get(link_id) != link:
+                self.publish(project, "link.created", link)
+        return 201, project.to_json()
+
+    # Metadata
+    def _get_computes(self, body):
+        return 200, self.computes
+
+    def _get_compute(self, body, compute_id):
+        compute = next((compute for compute in self.computes if compute["compute_id"] == compute_id), None)
+        return (200, compute) if compute else self._not_found(f"Compute {compute_id}")
+
+    def _get_templates(self, body):
+        return 200, [
+            {
+                "template_id": "19021f99-e36f-394d-b4a1-8aaa902ab9cc",
+                "name": "VPCS",
+                "category": "guest",
+                "compute_id": None,
+                "default_name_format": "PC{0}",
+                "template_type": "vpcs",
+                "builtin": True,
+            },
+            {
+                "template_id": "1966b864-93e7-32d5-965f-001384eec461",
+                "name": "Ethernet switch",
+                "category": "switch",
+                "compute_id": None,
+                "default_name_format": "Switch{0}",
+                "template_type": "ethernet_switch",
+                "builtin": True,
+                "ports_mapping": [
+                    {"name": f"Ethernet{port_number}", "port_number": port_number, "type": "access", "vlan": 1}
+                    for port_number in range(8)
+                ],
+            },
+        ]
+
+    def _get_version(self, body):
+        return 200, {"local": True, "version": "2.2.0"}
+
+    def _get_appliances(self, body):
+        return 200, []
+
+
+if __name__ == "__main__":
+    with MockGNS3Server(port=3080) as mock_server:
+        print(f"Mock GNS3 server listening on {mock_server.url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
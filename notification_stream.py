@@ -0,0 +1,115 @@
+import json
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+import requests
+
+from data_structure.links import LinkResponse
+from data_structure.nodes import Node
+from data_structure.records import LinkRecord, NodeRecord
+from project_state import ProjectState
+
+
+def apply_event(state: ProjectState, notification: Dict, fast_parse: bool = False) -> bool:
+    action = notification.get("action")
+    event = notification.get("event") or {}
+    if action in ("node.created", "node.updated"):
+        state.add_node(NodeRecord.from_json(event) if fast_parse else Node(**event))
+    elif action == "node.deleted":
+        state.remove_node(event["node_id"])
+    elif action in ("link.created", "link.updated"):
+        state.add_link(LinkRecord.from_json(event) if fast_parse else LinkResponse(**event))
+    elif action == "link.deleted":
+        state.remove_link(event["link_id"])
+    else:
+        return False
+    return True
+
+
+def replay_events(state: ProjectState, notifications: Iterable[Dict], fast_parse: bool = False) -> int:
+    return sum(apply_event(state, notification, fast_parse) for notification in notifications)
+
+
+class NotificationListener:
+    # Keeps connector.state in sync with /v2/projects/{id}/notifications from a
+    # background thread. The stream is opened before the state is loaded, so events
+    # sent during the load wait in the socket and are applied right after it.
+    def __init__(
+        self,
+        connector,
+        reconnect_delay: float = 1.0,
+        read_timeout: float = 30.0,
+        on_event: Optional[Callable[[Dict], None]] = None,
+    ) -> None:
+        self.connector = connector
+        self.reconnect_delay = reconnect_delay
+        self.read_timeout = read_timeout
+        self.on_event = on_event
+        self.synced = threading.Event()
+        self.applied = 0
+        self.errors = 0
+        self._stopping = threading.Event()
+        self._condition = threading.Condition()
+        self._response: Optional[requests.Response] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "NotificationListener":
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="gns3-notifications", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stopping.set()
+        self.synced.clear()
+        if self._response is not None:
+            self._response.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_synced(self, timeout: Optional[float] = None) -> bool:
+        return self.synced.wait(timeout)
+
+    def wait_for(self, count: int, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self.applied >= count, timeout)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                self.errors += 1
+                print(f"Warning: notification stream lost, reconnecting: {e}")
+            self.synced.clear()
+            self._stopping.wait(self.reconnect_delay)
+
+    def _listen(self) -> None:
+        connector = self.connector
+        url = f"{connector.url}/v2/projects/{connector.project_id}/notifications"
+        # Own session: the stream holds its connection for as long as it runs
+        with requests.Session() as session:
+            session.auth = connector.session.auth
+            self._response = session.get(url, stream=True, timeout=(5, self.read_timeout))
+            try:
+                self._response.raise_for_status()
+                connector.refresh_cache()
+                self.synced.set()
+                for line in self._response.iter_lines():
+                    if self._stopping.is_set():
+                        return
+                    if line:
+                        self._handle(json.loads(line))
+            finally:
+                self._response.close()
+
+    def _handle(self, notification: Dict) -> None:
+        state = self.connector.state
+        if state is not None and apply_event(state, notification, self.connector.fast_parse):
+            with self._condition:
+                self.applied += 1
+                self._condition.notify_all()
+        if self.on_event:
+            self.on_event(notification)
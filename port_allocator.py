@@ -0,0 +1,103 @@
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, Iterable, List, Set, Tuple
+
+from data_structure.links import LinkNode, LinkResponse
+from data_structure.nodes import Node
+
+
+class PortAllocator:
+    def __init__(self) -> None:
+        self.node_ids: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._free: Dict[str, Deque[Tuple[int, int]]] = {}
+        self._used: Dict[str, Set[Tuple[int, int]]] = {}
+        self._links: Dict[str, List[LinkNode]] = {}
+        self._node_links: Dict[str, Set[str]] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_project(cls, nodes: Iterable[Node], links: Iterable[LinkResponse]) -> "PortAllocator":
+        allocator = cls()
+        used: Dict[str, Set[Tuple[int, int]]] = {}
+        links = list(links)
+        for link in links:
+            for link_node in link.nodes:
+                used.setdefault(link_node.node_id, set()).add((link_node.adapter_number, link_node.port_number))
+        for node in nodes:
+            ports = [(port.adapter_number, port.port_number) for port in node.ports]
+            if node.name in allocator.node_ids:
+                # Leftover duplicate: the name stays on the first node, the one reconcile keeps
+                allocator._register_ports(node.node_id, ports, used.get(node.node_id, ()))
+            else:
+                allocator.register(node.name, node.node_id, ports, used.get(node.node_id, ()))
+        for link in links:
+            allocator.attach_link(link)
+        return allocator
+
+    def register(
+        self, node_name: str, node_id: str, ports: Iterable[Tuple[int, int]], used: Iterable[Tuple[int, int]] = ()
+    ) -> None:
+        with self._lock:
+            self.node_ids[node_name] = node_id
+            self._names[node_id] = node_name
+        self._register_ports(node_id, ports, used)
+
+    def _register_ports(self, node_id: str, ports: Iterable[Tuple[int, int]], used: Iterable[Tuple[int, int]]) -> None:
+        used = set(used)
+        with self._lock:
+            self._used[node_id] = used
+            self._free[node_id] = deque(port for port in ports if port not in used)
+
+    def register_node(self, node: Node) -> None:
+        self.register(node.name, node.node_id, [(port.adapter_number, port.port_number) for port in node.ports])
+
+    def forget(self, node_id: str) -> None:
+        # By id: with duplicate names, deleting one node must not drop the name of another
+        for link_id in list(self._node_links.get(node_id, ())):
+            self.release_link(link_id)
+        with self._lock:
+            node_name = self._names.pop(node_id, None)
+            if node_name is not None and self.node_ids.get(node_name) == node_id:
+                del self.node_ids[node_name]
+            self._free.pop(node_id, None)
+            self._used.pop(node_id, None)
+            self._node_links.pop(node_id, None)
+
+    def reserve(self, node_name: str) -> LinkNode:
+        with self._lock:
+            node_id = self.node_ids.get(node_name)
+            if node_id is None:
+                raise ValueError(f"Must have a node but {node_name} didn't match any known node.")
+            free = self._free[node_id]
+            if not free:
+                raise ValueError(f"No free port left on node {node_name}")
+            adapter_number, port_number = free.popleft()
+            self._used[node_id].add((adapter_number, port_number))
+            return LinkNode(node_id=node_id, adapter_number=adapter_number, port_number=port_number)
+
+    def release(self, link_node: LinkNode) -> None:
+        port = (link_node.adapter_number, link_node.port_number)
+        with self._lock:
+            used = self._used.get(link_node.node_id)
+            if used is None or port not in used:
+                return
+            used.remove(port)
+            self._free[link_node.node_id].appendleft(port)
+
+    def attach_link(self, link: LinkResponse) -> None:
+        with self._lock:
+            self._links[link.link_id] = list(link.nodes)
+            for link_node in link.nodes:
+                self._node_links.setdefault(link_node.node_id, set()).add(link.link_id)
+
+    def release_link(self, link_id: str) -> None:
+        with self._lock:
+            link_nodes = self._links.pop(link_id, [])
+            for link_node in link_nodes:
+                self._node_links.get(link_node.node_id, set()).discard(link_id)
+        for link_node in link_nodes:
+            self.release(link_node)
+
+    def free_count(self, node_name: str) -> int:
+        return len(self._free.get(self.node_ids.get(node_name, ""), ()))
@@ -0,0 +1,89 @@
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from data_structure.links import LinkResponse
+from data_structure.nodes import Node
+
+
+class ProjectState:
+    def __init__(self) -> None:
+        self.loaded: bool = False
+        self.nodes_by_name: Dict[str, Node] = {}
+        self.nodes_by_id: Dict[str, Node] = {}
+        self.links: Dict[str, LinkResponse] = {}
+        self.used_ports: Dict[str, Set[Tuple[int, int]]] = {}
+        self._node_links: Dict[str, Set[str]] = {}
+        self._lock = RLock()
+
+    def load(self, nodes: Iterable[Node], links: Iterable[LinkResponse]) -> None:
+        with self._lock:
+            self.clear()
+            for node in nodes:
+                self.add_node(node)
+            for link in links:
+                self.add_link(link)
+            self.loaded = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.loaded = False
+            self.nodes_by_name.clear()
+            self.nodes_by_id.clear()
+            self.links.clear()
+            self.used_ports.clear()
+            self._node_links.clear()
+
+    def add_node(self, node: Node) -> None:
+        with self._lock:
+            previous = self.nodes_by_id.get(node.node_id)
+            # Renamed node: drop the entry under its old name
+            if previous is not None and self.nodes_by_name.get(previous.name) is previous:
+                del self.nodes_by_name[previous.name]
+            self.nodes_by_name[node.name] = node
+            self.nodes_by_id[node.node_id] = node
+            self.used_ports.setdefault(node.node_id, set())
+
+    def remove_node(self, node_id: str) -> None:
+        with self._lock:
+            node = self.nodes_by_id.pop(node_id, None)
+            if node and self.nodes_by_name.get(node.name) is node:
+                del self.nodes_by_name[node.name]
+            self.used_ports.pop(node_id, None)
+            for link_id in list(self._node_links.pop(node_id, ())):
+                self.remove_link(link_id)
+
+    def add_link(self, link: LinkResponse) -> None:
+        with self._lock:
+            if link.link_id in self.links:
+                self.remove_link(link.link_id)
+            self.links[link.link_id] = link
+            for link_node in link.nodes:
+                self.used_ports.setdefault(link_node.node_id, set()).add(
+                    (link_node.adapter_number, link_node.port_number)
+                )
+                self._node_links.setdefault(link_node.node_id, set()).add(link.link_id)
+
+    def remove_link(self, link_id: str) -> None:
+        with self._lock:
+            link = self.links.pop(link_id, None)
+            if not link:
+                return
+            for link_node in link.nodes:
+                self.used_ports.get(link_node.node_id, set()).discard(
+                    (link_node.adapter_number, link_node.port_number)
+                )
+                self._node_links.get(link_node.node_id, set()).discard(link_id)
+
+    def list_nodes(self) -> List[Node]:
+        with self._lock:
+            return list(self.nodes_by_id.values())
+
+    def list_links(self) -> List[LinkResponse]:
+        with self._lock:
+            return list(self.links.values())
+
+    def get_node_by_name(self, node_name: str) -> Optional[Node]:
+        return self.nodes_by_name.get(node_name)
+
+    def is_port_used(self, node_id: str, adapter_number: int, port_number: int) -> bool:
+        return (adapter_number, port_number) in self.used_ports.get(node_id, ())
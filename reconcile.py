@@ -0,0 +1,86 @@
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from data_structure.links import LinkResponse
+from data_structure.nodes import Node
+from interface import KIND_NODE_TYPES
+
+
+class ReconcilePlan:
+    def __init__(self) -> None:
+        self.nodes_to_create: List[Tuple[str, str, str]] = []
+        self.nodes_to_delete: List[Node] = []
+        self.links_to_create: List[Tuple[str, str]] = []
+        self.links_to_delete: List[LinkResponse] = []
+
+    def is_empty(self) -> bool:
+        return not (self.nodes_to_create or self.nodes_to_delete or self.links_to_create or self.links_to_delete)
+
+    def request_count(self) -> int:
+        return (
+            len(self.nodes_to_create)
+            + len(self.nodes_to_delete)
+            + len(self.links_to_create)
+            + len(self.links_to_delete)
+        )
+
+    def __str__(self):
+        return (
+            f"nodes: +{len(self.nodes_to_create)} -{len(self.nodes_to_delete)}, "
+            f"links: +{len(self.links_to_create)} -{len(self.links_to_delete)}"
+        )
+
+
+def diff_project(
+    desired_nodes: Iterable[Tuple[str, str, str]],
+    desired_links: Iterable[Tuple[str, str]],
+    nodes: Iterable[Node],
+    links: Iterable[LinkResponse],
+    delete_extra: bool = True,
+) -> ReconcilePlan:
+    plan = ReconcilePlan()
+
+    existing_nodes: Dict[str, Node] = {}
+    for node in nodes:
+        if node.name in existing_nodes:
+            # Leftover duplicate from an earlier non-idempotent deploy
+            plan.nodes_to_delete.append(node)
+        else:
+            existing_nodes[node.name] = node
+
+    kept_names = set()
+    for name, kind, area_name in desired_nodes:
+        node = existing_nodes.get(name)
+        if node and node.node_type == KIND_NODE_TYPES[kind]:
+            kept_names.add(name)
+            continue
+        if node:
+            plan.nodes_to_delete.append(node)
+        plan.nodes_to_create.append((name, kind, area_name))
+
+    deleted_ids = {node.node_id for node in plan.nodes_to_delete}
+    if delete_extra:
+        for name, node in existing_nodes.items():
+            if name not in kept_names and node.node_id not in deleted_ids:
+                plan.nodes_to_delete.append(node)
+                deleted_ids.add(node.node_id)
+
+    names_by_id = {node.node_id: name for name, node in existing_nodes.items() if name in kept_names}
+    desired_pairs = {frozenset(pair) for pair in desired_links}
+
+    existing_pairs: Dict[FrozenSet[str], LinkResponse] = {}
+    for link in links:
+        node_ids = [link_node.node_id for link_node in link.nodes]
+        if any(node_id in deleted_ids for node_id in node_ids):
+            # GNS3 drops these together with the node
+            continue
+        pair = frozenset(names_by_id.get(node_id, node_id) for node_id in node_ids)
+        if pair in desired_pairs and pair not in existing_pairs:
+            existing_pairs[pair] = link
+        elif delete_extra or pair in existing_pairs:
+            plan.links_to_delete.append(link)
+
+    for source, target in desired_links:
+        if frozenset((source, target)) not in existing_pairs:
+            plan.links_to_create.append((source, target))
+
+    return plan
@@ -0,0 +1,142 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from layout import DEFAULT_NODE_SPACING, area_centers, layout_topology, ring_offsets
+
+DETAIL_MODES = ("auto", "full", "aggregate")
+DEFAULT_MAX_NODES = 2000
+LABEL_LIMIT = 150
+
+
+def area_colors(count: int) -> np.ndarray:
+    palette = colormaps["tab20"].colors
+    return np.asarray([palette[index % len(palette)] for index in range(count)])
+
+
+def node_count(topology) -> int:
+    return sum(len(area.nodes) + 1 for area in topology.areas) + sum(1 for link in topology.links if link.medium_node)
+
+
+def _draw_graph(
+    axes,
+    coordinates: np.ndarray,
+    colors: np.ndarray,
+    edges: np.ndarray,
+    labels: Optional[List[str]] = None,
+    sizes=20,
+    widths=0.5,
+) -> None:
+    if len(edges):
+        axes.add_collection(LineCollection(coordinates[edges], colors="#888888", linewidths=widths, zorder=1))
+    axes.scatter(coordinates[:, 0], coordinates[:, 1], s=sizes, c=colors, zorder=2, linewidths=0)
+    if labels is not None and len(labels) <= LABEL_LIMIT:
+        for (x, y), label in zip(coordinates, labels):
+            axes.annotate(label, (x, y), fontsize=7, ha="center", va="bottom", zorder=3)
+
+
+def render_full(axes, topology, mode: str = "grid", positions: Optional[Dict[str, Tuple[int, int]]] = None) -> None:
+    positions = positions or layout_topology(topology, mode)
+    nodes = topology.deploy_nodes()
+    index_of = {name: index for index, (name, _, _) in enumerate(nodes)}
+    area_index = {area.name: index for index, area in enumerate(topology.areas)}
+
+    coordinates = np.asarray([positions[name] for name, _, _ in nodes], dtype=float)
+    # GNS3 y axis points down
+    coordinates[:, 1] *= -1
+    colors = area_colors(len(area_index))[[area_index[area] for _, _, area in nodes]]
+    edges = np.asarray([(index_of[source], index_of[target]) for source, target in topology.deploy_links()], dtype=int)
+    _draw_graph(axes, coordinates, colors, edges.reshape(-1, 2), [name for name, _, _ in nodes])
+
+
+def render_aggregate(axes, topology, mode: str = "grid") -> None:
+    # One super-node per area sized by its node count, one edge per connected pair of
+    # areas as thick as the number of links between them
+    areas = list(topology.areas)
+    area_index = {area.name: index for index, area in enumerate(areas)}
+    counts = np.asarray([len(area.nodes) + 1 for area in areas], dtype=float)
+    coordinates = area_centers(len(areas), 1.0, mode).astype(float)
+    coordinates[:, 1] *= -1
+
+    pair_counts: Dict[Tuple[int, int], int] = {}
+    for link in topology.links:
+        pair = tuple(sorted((area_index[link.source_area.name], area_index[link.target_area.name])))
+        pair_counts[pair] = pair_counts.get(pair, 0) + 1
+    edges = np.asarray(list(pair_counts), dtype=int).reshape(-1, 2)
+    widths = 0.5 + np.log2(np.asarray(list(pair_counts.values()), dtype=float)) if pair_counts else 0.5
+
+    largest = counts.max() if len(counts) else 1.0
+    sizes = 60 + 1500 * np.sqrt(counts / largest) / max(1.0, math.sqrt(len(areas)) / 4)
+    labels = [f"{area.name} ({int(count)})" for area, count in zip(areas, counts)]
+    _draw_graph(axes, coordinates, area_colors(len(areas)), edges, labels, sizes, widths)
+
+
+def render_area(axes, topology, area_name: str, node_spacing: float = DEFAULT_NODE_SPACING) -> None:
+    area = topology.get_area(area_name)
+    names = [node.name for node in area.nodes]
+    offsets, rings = ring_offsets(np.arange(len(names)), np.full(len(names), len(names)), node_spacing)
+    coordinates = [(0.0, 0.0)] + [tuple(offset) for offset in offsets]
+    names = [area.central_node.name] + names
+    colors = [0] * len(names)
+    index_of = {name: index for index, name in enumerate(names)}
+    edges = [(index_of[link.source.name], index_of[link.target.name]) for link in area.links]
+
+    # Inter-area links end on the peer areas, drawn as one outer ring of stubs
+    boundary = [link for link in topology.links if area_name in (link.source_area.name, link.target_area.name)]
+    radius = (int(rings.max()) + 2 if len(rings) else 2) * node_spacing
+    for position, link in enumerate(boundary):
+        angle = 2 * math.pi * position / len(boundary)
+        outgoing = link.source_area.name == area_name
+        local = link.source_node if outgoing else link.target_node
+        peer = link.target_area if outgoing else link.source_area
+        label = link.medium_node.name if link.medium_node else peer.central_node.name
+        if label not in index_of:
+            index_of[label] = len(names)
+            names.append(f"{label} [{peer.name}]")
+            coordinates.append((radius * math.cos(angle), radius * math.sin(angle)))
+            colors.append(1)
+        edges.append((index_of[local.name], index_of[label]))
+
+    coordinates_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    palette = np.asarray([colormaps["tab20"].colors[0], (0.6, 0.6, 0.6)])
+    _draw_graph(
+        axes, coordinates_array, palette[colors], np.asarray(edges, dtype=int).reshape(-1, 2), names, sizes=40
+    )
+
+
+def render_topology(
+    topology,
+    path: str,
+    detail: str = "auto",
+    area: Optional[str] = None,
+    mode: str = "grid",
+    max_nodes: int = DEFAULT_MAX_NODES,
+    positions: Optional[Dict[str, Tuple[int, int]]] = None,
+    size: float = 12.0,
+    dpi: int = 100,
+) -> str:
+    if detail not in DETAIL_MODES:
+        raise ValueError(f"Unknown detail {detail}, expected one of {', '.join(DETAIL_MODES)}")
+    if detail == "auto":
+        detail = "full" if area is not None or node_count(topology) <= max_nodes else "aggregate"
+
+    # Figure without pyplot: no GUI backend, no window
+    figure = Figure(figsize=(size, size), dpi=dpi)
+    axes = figure.add_subplot()
+    if area is not None:
+        render_area(axes, topology, area)
+        detail = f"area {area}"
+    elif detail == "full":
+        render_full(axes, topology, mode, positions)
+    else:
+        render_aggregate(axes, topology, mode)
+    axes.set_aspect("equal")
+    axes.autoscale_view()
+    axes.margins(0.05)
+    axes.set_axis_off()
+    figure.savefig(path, bbox_inches="tight")
+    return detail
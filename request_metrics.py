@@ -0,0 +1,190 @@
+import json
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ID_PLACEHOLDERS = {
+    "projects": "{project_id}",
+    "nodes": "{node_id}",
+    "links": "{link_id}",
+    "computes": "{compute_id}",
+    "templates": "{template_id}",
+    "snapshots": "{snapshot_id}",
+    "drawings": "{drawing_id}",
+}
+ACTION_SEGMENTS = {"load", "start", "stop", "suspend", "reload", "notifications"}
+
+
+def endpoint_template(endpoint: str) -> str:
+    segments = endpoint.split("?")[0].split("/")
+    for index in range(1, len(segments)):
+        placeholder = ID_PLACEHOLDERS.get(segments[index - 1])
+        if placeholder and segments[index] not in ACTION_SEGMENTS:
+            segments[index] = placeholder
+    return "/".join(segments)
+
+
+class EndpointMetrics:
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors: Dict[int, int] = {}
+        self.latency_sum = 0.0
+        self.latency_buckets: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.response_bytes = 0
+        self.decode_time = 0.0
+        self.validation_time = 0.0
+
+    def to_json(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": {str(status): count for status, count in self.errors.items()},
+            "latency_sum": self.latency_sum,
+            "latency_mean": self.latency_sum / self.count if self.count else 0.0,
+            "latency_buckets": dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"], self.latency_buckets)),
+            "response_bytes": self.response_bytes,
+            "decode_time": self.decode_time,
+            "validation_time": self.validation_time,
+        }
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self._lock = Lock()
+
+    def _get(self, method: str, endpoint: str) -> EndpointMetrics:
+        key = (method, endpoint_template(endpoint))
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints.setdefault(key, EndpointMetrics())
+        return metrics
+
+    def record_request(
+        self, method: str, endpoint: str, status: int, latency: float, response_bytes: int, decode_time: float
+    ) -> None:
+        with self._lock:
+            metrics = self._get(method, endpoint)
+            metrics.count += 1
+            if status >= 400 or status == 0:
+                metrics.errors[status] = metrics.errors.get(status, 0) + 1
+            metrics.latency_sum += latency
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    metrics.latency_buckets[index] += 1
+                    break
+            else:
+                metrics.latency_buckets[-1] += 1
+            metrics.response_bytes += response_bytes
+            metrics.decode_time += decode_time
+
+    @contextmanager
+    def validation(self, method: str, endpoint: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._get(method, endpoint).validation_time += elapsed
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {f"{method} {template}": metrics.to_json() for (method, template), metrics in self.endpoints.items()}
+
+    def mean_latency(self, method: str, template: str, default: float) -> float:
+        metrics = self.endpoints.get((method, template))
+        if not metrics or not metrics.count:
+            return default
+        return metrics.latency_sum / metrics.count
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        # The exposition format wants each family's samples right after its TYPE line
+        families = [
+            ("gns3_requests_total", "counter", lambda labels, metrics: [f"{{{labels}}} {metrics.count}"]),
+            (
+                "gns3_request_errors_total",
+                "counter",
+                lambda labels, metrics: [
+                    f'{{{labels},status="{status}"}} {count}' for status, count in sorted(metrics.errors.items())
+                ],
+            ),
+            ("gns3_request_duration_seconds", "histogram", self._histogram_samples),
+            (
+                "gns3_response_bytes_total",
+                "counter",
+                lambda labels, metrics: [f"{{{labels}}} {metrics.response_bytes}"],
+            ),
+            ("gns3_decode_seconds_total", "counter", lambda labels, metrics: [f"{{{labels}}} {metrics.decode_time}"]),
+            (
+                "gns3_validation_seconds_total",
+                "counter",
+                lambda labels, metrics: [f"{{{labels}}} {metrics.validation_time}"],
+            ),
+        ]
+        lines = []
+        with self._lock:
+            endpoints = [
+                (f'method="{method}",endpoint="{template}"', metrics)
+                for (method, template), metrics in sorted(self.endpoints.items())
+            ]
+            for name, kind, samples in families:
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, metrics in endpoints:
+                    lines.extend(name + sample for sample in samples(labels, metrics))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_samples(labels: str, metrics: EndpointMetrics) -> List[str]:
+        samples = []
+        cumulative = 0
+        for bound, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], metrics.latency_buckets):
+            cumulative += count
+            samples.append(f'_bucket{{{labels},le="{bound}"}} {cumulative}')
+        samples.append(f"_sum{{{labels}}} {metrics.latency_sum}")
+        samples.append(f"_count{{{labels}}} {metrics.count}")
+        return samples
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as metrics_file:
+            metrics_file.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+    @classmethod
+    def load(cls, path: str) -> "RequestMetrics":
+        # Reads back a JSON dump, e.g. to estimate a deploy from the latencies of an earlier one
+        with open(path) as metrics_file:
+            data = json.load(metrics_file)
+        metrics = cls()
+        for name, values in data.items():
+            method, template = name.split(" ", 1)
+            endpoint = metrics.endpoints.setdefault((method, template), EndpointMetrics())
+            endpoint.count = values["count"]
+            endpoint.errors = {int(status): count for status, count in values["errors"].items()}
+            endpoint.latency_sum = values["latency_sum"]
+            endpoint.latency_buckets = list(values["latency_buckets"].values())
+            endpoint.response_bytes = values["response_bytes"]
+            endpoint.decode_time = values["decode_time"]
+            endpoint.validation_time = values["validation_time"]
+        return metrics
+
+    def summary(self) -> str:
+        rows = [
+            f"{'endpoint':60} {'count':>7} {'errors':>6} {'mean(ms)':>9} "
+            f"{'kB':>9} {'decode(s)':>9} {'valid(s)':>9}"
+        ]
+        for name, metrics in sorted(self.snapshot().items(), key=lambda item: -item[1]["latency_sum"]):
+            rows.append(
+                f"{name:60} {metrics['count']:>7} {sum(metrics['errors'].values()):>6} "
+                f"{metrics['latency_mean'] * 1000:>9.2f} {metrics['response_bytes'] / 1e3:>9.1f} "
+                f"{metrics['decode_time']:>9.3f} {metrics['validation_time']:>9.3f}"
+            )
+        return "\n".join(rows)
@@ -0,0 +1,140 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+TUNNEL_BASE_PORT = 20000
+
+
+class TunnelEndpoint:
+    __slots__ = ("name", "shard", "peer_shard", "lport", "rhost", "rport")
+
+    def __init__(self, name: str, shard: str, peer_shard: str, lport: int, rhost: str, rport: int):
+        self.name = name
+        self.shard = shard
+        self.peer_shard = peer_shard
+        self.lport = lport
+        self.rhost = rhost
+        self.rport = rport
+
+    def ports_mapping(self) -> List[Dict]:
+        return [
+            {
+                "name": f"UDP tunnel to {self.peer_shard}",
+                "port_number": 0,
+                "type": "udp",
+                "lport": self.lport,
+                "rhost": self.rhost,
+                "rport": self.rport,
+            }
+        ]
+
+    def to_json(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Shard:
+    def __init__(self, name: str, host: str):
+        self.name = name
+        self.host = host
+        self.areas: List[str] = []
+        self.nodes: List[Tuple[str, str, str]] = []
+        self.links: List[Tuple[str, str]] = []
+        self.tunnels: List[TunnelEndpoint] = []
+
+    def to_json(self) -> Dict:
+        return {
+            "host": self.host,
+            "areas": self.areas,
+            "nodes": len(self.nodes),
+            "links": len(self.links),
+            "tunnels": [tunnel.to_json() for tunnel in self.tunnels],
+        }
+
+
+class ShardMap:
+    # Areas are the shard unit: an area and all its intra-area links live on one
+    # server. Inter-area links between two shards are cut in half and each half
+    # ends on a cloud node holding one side of a UDP tunnel to the peer server.
+    def __init__(self, shards: List[Shard]):
+        self.shards: Dict[str, Shard] = {shard.name: shard for shard in shards}
+        self.area_shards: Dict[str, str] = {}
+
+    @classmethod
+    def build(
+        cls,
+        topology,
+        hosts: Dict[str, str],
+        assignment: Optional[Dict[str, str]] = None,
+        base_port: int = TUNNEL_BASE_PORT,
+    ) -> "ShardMap":
+        if not hosts:
+            raise ValueError("Sharding needs at least one shard")
+        shard_map = cls([Shard(name, host) for name, host in hosts.items()])
+        shard_map.assign(topology, assignment or {})
+
+        for area in topology.areas:
+            shard = shard_map.shards[shard_map.area_shards[area.name]]
+            for node in area.nodes:
+                shard.nodes.append((node.name, node.kind, area.name))
+            shard.nodes.append((area.central_node.name, "switch", area.name))
+            shard.links.extend((link.source.name, link.target.name) for link in area.links)
+
+        for link in topology.links:
+            source_shard = shard_map.shards[shard_map.area_shards[link.source_area.name]]
+            target_shard = shard_map.shards[shard_map.area_shards[link.target_area.name]]
+            near_node = link.source_node.name
+            if link.medium_node:
+                source_shard.nodes.append((link.medium_node.name, "router", link.source_area.name))
+                source_shard.links.append((link.source_node.name, link.medium_node.name))
+                near_node = link.medium_node.name
+            if source_shard is target_shard:
+                source_shard.links.append((near_node, link.target_node.name))
+                continue
+
+            name = f"Tunnel-{link.source_node.name}-{link.target_node.name}"
+            source_port = base_port + 2 * shard_map.cross_link_count()
+            target_port = source_port + 1
+            source_shard.tunnels.append(
+                TunnelEndpoint(name, source_shard.name, target_shard.name, source_port, target_shard.host, target_port)
+            )
+            target_shard.tunnels.append(
+                TunnelEndpoint(name, target_shard.name, source_shard.name, target_port, source_shard.host, source_port)
+            )
+            source_shard.links.append((near_node, name))
+            target_shard.links.append((name, link.target_node.name))
+        return shard_map
+
+    def assign(self, topology, assignment: Dict[str, str]) -> None:
+        # Largest areas first, each onto the shard holding the fewest nodes so far
+        load = {name: 0 for name in self.shards}
+        for area_name, shard_name in assignment.items():
+            if shard_name not in self.shards:
+                raise ValueError(f"Area {area_name} assigned to unknown shard {shard_name}")
+        areas = sorted(topology.areas, key=lambda area: len(area.nodes), reverse=True)
+        for area in areas:
+            shard_name = assignment.get(area.name) or min(load, key=load.get)
+            self.area_shards[area.name] = shard_name
+            load[shard_name] += len(area.nodes) + 1
+        for shard in self.shards.values():
+            shard.areas = [area.name for area in topology.areas if self.area_shards[area.name] == shard.name]
+
+    def shard_of(self, area_name: str) -> Shard:
+        return self.shards[self.area_shards[area_name]]
+
+    def cross_link_count(self) -> int:
+        return sum(len(shard.tunnels) for shard in self.shards.values()) // 2
+
+    def to_json(self) -> Dict:
+        return {name: shard.to_json() for name, shard in self.shards.items()}
+
+    def __str__(self):
+        lines = [f"{len(self.shards)} shards, {self.cross_link_count()} cross-shard links"]
+        for shard in self.shards.values():
+            lines.append(
+                f"{shard.name} ({shard.host}): {len(shard.areas)} areas, {len(shard.nodes)} nodes, "
+                f"{len(shard.links)} links, {len(shard.tunnels)} tunnels"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as shard_file:
+            json.dump(self.to_json(), shard_file, indent=2)
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+SNAPSHOT_PREFIX = "ordum-"
+DEFAULT_MAX_SNAPSHOTS = 5
+
+
+def topology_hash(topology, extra: Optional[Any] = None) -> str:
+    # Canonical form: sorted nodes and undirected links, so the hash does not depend
+    # on insertion order or link direction. extra covers deploy options such as
+    # positions that change what ends up in the project.
+    canonical = {
+        "nodes": sorted(topology.deploy_nodes()),
+        "links": sorted(sorted(link) for link in topology.deploy_links()),
+        "extra": extra,
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class SnapshotCache:
+    # Snapshot names carry the topology hash, so the GNS3 server stays the source of
+    # truth; the local index only records the LRU order per project.
+    def __init__(
+        self,
+        connector,
+        path: Optional[str] = None,
+        max_snapshots: int = DEFAULT_MAX_SNAPSHOTS,
+        prefix: str = SNAPSHOT_PREFIX,
+    ) -> None:
+        self.connector = connector
+        self.path = path
+        self.max_snapshots = max_snapshots
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self._index: Dict[str, Dict[str, float]] = {}
+        self.load()
+
+    def snapshot_name(self, digest: str) -> str:
+        return f"{self.prefix}{digest[:16]}"
+
+    def _project_snapshots(self) -> Dict[str, str]:
+        snapshots = self.connector.get_snapshots(self.connector.project_id)
+        if isinstance(snapshots, dict):
+            print(f"Warning: could not list snapshots: {snapshots.get('message')}")
+            return {}
+        return {
+            snapshot["name"]: snapshot["snapshot_id"]
+            for snapshot in snapshots
+            if snapshot["name"].startswith(self.prefix)
+        }
+
+    def _usage(self) -> Dict[str, float]:
+        return self._index.setdefault(self.connector.project_id, {})
+
+    def lookup(self, digest: str) -> Optional[str]:
+        name = self.snapshot_name(digest)
+        snapshot_id = self._project_snapshots().get(name)
+        if snapshot_id is None:
+            self._usage().pop(name, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot_id
+
+    def restore(self, digest: str) -> bool:
+        snapshot_id = self.lookup(digest)
+        if snapshot_id is None:
+            return False
+        data = self.connector.restore_snapshot(self.connector.project_id, snapshot_id)
+        if data.get("message"):
+            print(f"Warning: restoring snapshot {self.snapshot_name(digest)} failed: {data['message']}")
+            return False
+        self._usage()[self.snapshot_name(digest)] = time.time()
+        self.save()
+        return True
+
+    def store(self, digest: str) -> Optional[str]:
+        name = self.snapshot_name(digest)
+        snapshots = self._project_snapshots()
+        snapshot_id = snapshots.get(name)
+        if snapshot_id is None:
+            data = self.connector.create_snapshot(self.connector.project_id, name)
+            if data.get("message"):
+                print(f"Warning: creating snapshot {name} failed: {data['message']}")
+                return None
+            snapshot_id = data["snapshot_id"]
+            snapshots[name] = snapshot_id
+        self._usage()[name] = time.time()
+        self.evict(snapshots)
+        self.save()
+        return snapshot_id
+
+    def evict(self, snapshots: Dict[str, str]) -> List[str]:
+        # Snapshots this index has never seen count as the oldest
+        usage = self._usage()
+        by_age = sorted(snapshots, key=lambda name: usage.get(name, 0.0))
+        evicted = by_age[: max(0, len(by_age) - self.max_snapshots)]
+        for name in evicted:
+            self.connector.delete_snapshot(self.connector.project_id, snapshots[name])
+            usage.pop(name, None)
+        return evicted
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump(self._index, index_file)
+        os.replace(temporary_path, self.path)
+
+    def load(self) -> None:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path) as index_file:
+                self._index = json.load(index_file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable snapshot index {self.path}: {e}")
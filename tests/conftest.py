@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gns3_connector import GNS3Connector
+from mock_gns3_server import MockGNS3Server
+
+
+def project_totals(connector):
+    nodes = connector.get_nodes(connector.project_id)
+    links = connector.get_all_links(connector.project_id).links
+    return len(nodes), len(links)
+
+
+@pytest.fixture
+def server():
+    with MockGNS3Server() as mock_server:
+        yield mock_server
+
+
+@pytest.fixture
+def connector(server):
+    gns3_connector = GNS3Connector(server.url, "gns3", "gns3", fast_parse=True)
+    yield gns3_connector
+    gns3_connector.unsubscribe()
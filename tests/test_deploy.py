@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from conftest import project_totals
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+
+
+def assert_ports_unique(connector):
+    used = set()
+    for link in connector.get_all_links(connector.project_id).links:
+        for link_node in link.nodes:
+            port = (link_node.node_id, link_node.adapter_number, link_node.port_number)
+            assert port not in used
+            used.add(port)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_deploy_creates_every_node_and_link(connector, workers):
+    topology = GlobalTopology.star_chain(3)
+    TopologyGenerator().deploy(HyperInterface(connector), topology, workers=workers)
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+    assert_ports_unique(connector)
+
+
+def test_deploy_async_creates_every_node_and_link(server, connector):
+    from async_gns3_connector import AsyncGNS3Connector
+    from async_interface import AsyncHyperInterface
+
+    topology = GlobalTopology.star_chain(3)
+
+    async def deploy():
+        async with await AsyncGNS3Connector.connect(server.url, "gns3", "gns3", max_concurrency=4) as async_connector:
+            await TopologyGenerator().deploy_async(AsyncHyperInterface(async_connector), topology)
+
+    asyncio.run(deploy())
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+    assert_ports_unique(connector)
+
+
+def test_deploy_file_loads_every_node_and_link(connector, tmp_path):
+    topology = GlobalTopology.star_chain(3)
+    TopologyGenerator().deploy_file(HyperInterface(connector), topology, str(tmp_path), "file-deploy")
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_server_counts_requests_per_endpoint(server, connector):
+    topology = GlobalTopology.star_chain(2)
+    server.reset_stats()
+    TopologyGenerator().deploy(HyperInterface(connector), topology)
+    endpoints = server.stats()["endpoints"]
+    assert endpoints["POST nodes"] == len(topology.deploy_nodes())
+    assert endpoints["POST links"] == len(topology.deploy_links())
@@ -0,0 +1,81 @@
+import pytest
+
+from conftest import project_totals
+from deploy_journal import DONE, DeployJournal
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+
+
+def deploy(connector, topology, path, resume=False, workers=1):
+    with DeployJournal(str(path), resume=resume) as journal:
+        TopologyGenerator().deploy(HyperInterface(connector), topology, workers=workers, journal=journal)
+        return journal.counts()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_retries_only_what_failed(server, connector, tmp_path, monkeypatch, workers):
+    topology = GlobalTopology.star_chain(2)
+    path = tmp_path / "deploy.jsonl"
+    create_link = HyperInterface.create_link
+
+    def flaky_create_link(interface, source, target):
+        if target.endswith("3"):
+            raise ValueError("server went away")
+        return create_link(interface, source, target)
+
+    monkeypatch.setattr(HyperInterface, "create_link", flaky_create_link)
+    counts = deploy(connector, topology, path, workers=workers)
+    assert counts["failed"] == 2
+    monkeypatch.undo()
+
+    server.reset_stats()
+    counts = deploy(connector, topology, path, resume=True, workers=workers)
+    total = len(topology.deploy_nodes()) + len(topology.deploy_links())
+    assert counts == {DONE: total, "failed": 0, "planned": 0, "pending": 0}
+    assert server.stats()["endpoints"].get("POST nodes", 0) == 0
+    assert server.stats()["endpoints"]["POST links"] == 2
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_resume_adopts_unconfirmed_operations(server, connector, tmp_path):
+    topology = GlobalTopology.star_chain(2)
+    path = tmp_path / "deploy.jsonl"
+    deploy(connector, topology, path)
+
+    # Crash right after the last requests were sent: their done records never made it,
+    # and the final line was only half written
+    lines = path.read_text().splitlines(keepends=True)
+    done = [index for index, line in enumerate(lines) if '"status":"done"' in line]
+    kept = [line for index, line in enumerate(lines) if index not in done[-3:]]
+    path.write_text("".join(kept) + lines[done[-1]][:20])
+
+    server.reset_stats()
+    counts = deploy(connector, topology, path, resume=True)
+    assert counts["failed"] == counts["planned"] == counts["pending"] == 0
+    assert server.stats()["endpoints"].get("POST nodes", 0) == 0
+    assert server.stats()["endpoints"].get("POST links", 0) == 0
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_fresh_run_after_torn_line_is_not_lost(connector, tmp_path):
+    topology = GlobalTopology.star_chain(1)
+    path = tmp_path / "deploy.jsonl"
+    deploy(connector, topology, path)
+    with open(path, "a") as journal_file:
+        journal_file.write('{"op":"node","name":"A0-A00","sta')
+
+    other = GlobalTopology.star_chain(2)
+    with DeployJournal(str(path)) as journal:
+        journal.begin("other", other.deploy_nodes(), other.deploy_links())
+    # The begin record of the fresh run survives, so nothing from the first run is taken as done
+    journal = DeployJournal(str(path), resume=True)
+    journal.begin("other", other.deploy_nodes(), other.deploy_links())
+    journal.close()
+    assert journal.counts()["pending"] == len(other.deploy_nodes()) + len(other.deploy_links())
+
+
+def test_resume_refuses_another_topology(connector, tmp_path):
+    path = tmp_path / "deploy.jsonl"
+    deploy(connector, GlobalTopology.star_chain(1), path)
+    with pytest.raises(ValueError, match="another topology"):
+        deploy(connector, GlobalTopology.star_chain(2), path, resume=True)
@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import project_totals
+from deploy_plan import DeployPlan
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+
+
+def test_plan_deploys_every_node_and_link(connector):
+    topology = GlobalTopology.star_chain(3)
+    plan = DeployPlan.from_topology(topology)
+    TopologyGenerator().deploy_plan(HyperInterface(connector), plan, workers=4)
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_plan_with_unplaceable_links_is_refused(server, connector):
+    topology = GlobalTopology()
+    topology.connect_areas([topology.build_star(f"A{index}", 20) for index in range(3)], "chain")
+    plan = DeployPlan.from_topology(topology)
+    assert plan.unplaceable
+    server.reset_stats()
+    with pytest.raises(ValueError, match="no free port"):
+        TopologyGenerator().deploy_plan(HyperInterface(connector), plan)
+    assert "POST nodes" not in server.stats()["endpoints"]
+
+
+def test_plan_into_a_project_holding_its_nodes_is_refused(server, connector):
+    plan = DeployPlan.from_topology(GlobalTopology.star_chain(1))
+    generator = TopologyGenerator()
+    generator.deploy_plan(HyperInterface(connector), plan)
+    server.reset_stats()
+    with pytest.raises(ValueError, match="already exist"):
+        generator.deploy_plan(HyperInterface(connector), plan)
+    assert "POST nodes" not in server.stats()["endpoints"]
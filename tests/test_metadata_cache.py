@@ -0,0 +1,27 @@
+from gns3_connector import GNS3Connector
+from metadata_cache import MetadataCache
+from mock_gns3_server import MockGNS3Server
+
+
+def test_cache_file_does_not_leak_between_servers(tmp_path):
+    path = str(tmp_path / "metadata.json")
+    with MockGNS3Server(project_names=("lab",)) as first, MockGNS3Server(project_names=("lab",)) as second:
+        first_connector = GNS3Connector(first.url, "gns3", "gns3", "lab", metadata_cache=MetadataCache(path=path))
+        second_connector = GNS3Connector(second.url, "gns3", "gns3", "lab", metadata_cache=MetadataCache(path=path))
+        assert [project.project_id for project in first_connector.get_projects().projects] == list(first.projects)
+        assert [project.project_id for project in second_connector.get_projects().projects] == list(second.projects)
+
+        # A fresh process reusing the file is served from it, for its own server only
+        second.reset_stats()
+        warm = GNS3Connector(second.url, "gns3", "gns3", "lab", metadata_cache=MetadataCache(path=path))
+        assert warm.project_id == second_connector.project_id
+        assert "GET projects" not in second.stats()["endpoints"]
+
+
+def test_error_responses_are_not_cached(server):
+    cache = MetadataCache()
+    connector = GNS3Connector(server.url, "gns3", "gns3", metadata_cache=cache)
+    server.reset_stats()
+    connector.get_compute("missing")
+    connector.get_compute("missing")
+    assert server.stats()["endpoints"]["GET compute"] == 2
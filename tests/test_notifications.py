@@ -0,0 +1,35 @@
+from gns3_connector import GNS3Connector
+from interface import HyperInterface
+
+
+def test_external_edits_reach_local_reads(server, connector):
+    listener = connector.subscribe(timeout=5.0)
+    assert listener.synced.is_set()
+
+    # Someone else edits the same project through their own connector
+    applied = listener.applied
+    other = HyperInterface(GNS3Connector(server.url, "gns3", "gns3"))
+    first = other.create_switch("External-Switch")
+    other.create_vpcs("External-PC")
+    other.create_link("External-Switch", "External-PC")
+    assert listener.wait_for(applied + 3, timeout=5.0)
+
+    server.reset_stats()
+    nodes = connector.get_nodes(connector.project_id)
+    links = connector.get_all_links(connector.project_id).links
+    assert server.stats()["requests"] == 0
+    assert sorted(node.name for node in nodes) == ["External-PC", "External-Switch"]
+    assert len(links) == 1
+
+    applied = listener.applied
+    other.delete_node(first)
+    assert listener.wait_for(applied + 1, timeout=5.0)
+    server.reset_stats()
+    assert [node.name for node in connector.get_nodes(connector.project_id)] == ["External-PC"]
+    assert connector.get_all_links(connector.project_id).links == []
+    assert server.stats()["requests"] == 0
+
+    connector.unsubscribe()
+    server.reset_stats()
+    assert len(connector.get_nodes(connector.project_id)) == 1
+    assert server.stats()["requests"] == 1
@@ -0,0 +1,18 @@
+import cli
+
+
+def test_plan_reads_budgets_from_the_server(server, tmp_path):
+    output = tmp_path / "plan.json"
+    argv = ["plan", "--areas", "2", "--nodes-per-area", "6", "--url", server.url, "--output", str(output)]
+    assert cli.run(argv) == 0
+    assert server.stats()["endpoints"]["GET templates"] == 1
+    assert output.exists()
+
+
+def test_plan_fails_on_oversubscription(tmp_path):
+    output = tmp_path / "plan.json"
+    argv = ["plan", "--areas", "3", "--nodes-per-area", "20", "--output", str(output)]
+    assert cli.run(argv) == 1
+    assert not output.exists()
+    assert cli.run(argv + ["--cascade"]) == 0
+    assert output.exists()
@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import project_totals
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_reconcile_is_idempotent(connector, workers):
+    topology = GlobalTopology.star_chain(3)
+    generator = TopologyGenerator()
+    first = generator.reconcile(HyperInterface(connector), topology, workers=workers)
+    assert len(first.nodes_to_create) == len(topology.deploy_nodes())
+    assert len(first.links_to_create) == len(topology.deploy_links())
+
+    second = generator.reconcile(HyperInterface(connector), topology, workers=workers)
+    assert second.is_empty()
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_reconcile_completes_a_partial_deploy(connector):
+    topology = GlobalTopology.star_chain(2)
+    interface = HyperInterface(connector)
+    for name, kind, _ in topology.deploy_nodes()[:5]:
+        interface.create(kind, name)
+
+    generator = TopologyGenerator()
+    plan = generator.reconcile(HyperInterface(connector), topology)
+    assert len(plan.nodes_to_create) == len(topology.deploy_nodes()) - 5
+    assert generator.reconcile(HyperInterface(connector), topology).is_empty()
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_reconcile_converges_with_duplicate_nodes(connector):
+    topology = GlobalTopology.star_chain(1)
+    interface = HyperInterface(connector)
+    for _ in range(2):
+        for name, kind, _ in topology.deploy_nodes():
+            interface.create(kind, name)
+
+    generator = TopologyGenerator()
+    plan = generator.reconcile(HyperInterface(connector), topology)
+    assert len(plan.nodes_to_delete) == len(topology.deploy_nodes())
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+    assert generator.reconcile(HyperInterface(connector), topology).is_empty()
@@ -0,0 +1,38 @@
+import contextlib
+
+import pytest
+
+from conftest import project_totals
+from gns3_connector import GNS3Connector
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+from mock_gns3_server import MockGNS3Server
+from sharding import ShardMap
+
+
+@pytest.mark.parametrize("shard_count, workers", [(2, 1), (3, 4)])
+def test_sharded_deploy_totals(shard_count, workers):
+    topology = GlobalTopology.star_chain(5)
+    with contextlib.ExitStack() as stack:
+        servers = {f"shard{index}": stack.enter_context(MockGNS3Server()) for index in range(shard_count)}
+        shard_map = ShardMap.build(topology, {name: "127.0.0.1" for name in servers})
+        connectors = {
+            name: GNS3Connector(server.url, "gns3", "gns3", fast_parse=True) for name, server in servers.items()
+        }
+        interfaces = {name: HyperInterface(connector) for name, connector in connectors.items()}
+        TopologyGenerator().deploy_sharded(shard_map, interfaces, workers=workers)
+
+        totals = {name: project_totals(connector) for name, connector in connectors.items()}
+        for name, shard in shard_map.shards.items():
+            assert totals[name] == (len(shard.nodes) + len(shard.tunnels), len(shard.links))
+
+        # Every node lands on exactly one server; each cut link adds two tunnel clouds and one link
+        cross_links = shard_map.cross_link_count()
+        assert cross_links > 0
+        assert sum(nodes for nodes, _ in totals.values()) == len(topology.deploy_nodes()) + 2 * cross_links
+        assert sum(links for _, links in totals.values()) == len(topology.deploy_links()) + cross_links
+        names = [node.name for connector in connectors.values() for node in connector.get_nodes(connector.project_id)]
+        tunnels = [name for name in names if name.startswith("Tunnel-")]
+        assert sorted(set(names) - set(tunnels)) == sorted(name for name, _, _ in topology.deploy_nodes())
+        assert len(names) - len(tunnels) == len(topology.deploy_nodes())
+        assert all(tunnels.count(name) == 2 for name in tunnels)
@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import project_totals
+from interface import HyperInterface
+from main import GlobalTopology, TopologyGenerator
+from snapshot_cache import SnapshotCache
+
+
+def test_miss_deploys_and_hit_restores(server, connector, tmp_path):
+    topology = GlobalTopology.star_chain(2)
+    cache = SnapshotCache(connector, str(tmp_path / "index.json"))
+    generator = TopologyGenerator()
+    generator.deploy_cached(HyperInterface(connector), topology, cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    server.reset_stats()
+    generator.deploy_cached(HyperInterface(connector), topology, cache, wipe=True)
+    assert cache.hits == 1
+    assert server.stats()["endpoints"].get("POST nodes", 0) == 0
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
+
+
+def test_non_empty_project_needs_wipe(connector, tmp_path):
+    interface = HyperInterface(connector)
+    interface.create_switch("Someone-Else")
+    topology = GlobalTopology.star_chain(1)
+    cache = SnapshotCache(connector, str(tmp_path / "index.json"))
+    generator = TopologyGenerator()
+    with pytest.raises(ValueError, match="--wipe"):
+        generator.deploy_cached(interface, topology, cache)
+    assert project_totals(connector) == (1, 0)
+
+    generator.deploy_cached(interface, topology, cache, wipe=True)
+    assert project_totals(connector) == (len(topology.deploy_nodes()), len(topology.deploy_links()))
@@ -0,0 +1,97 @@
+import json
+from typing import IO, Dict, Iterable, Iterator
+
+
+def iter_records(topology) -> Iterator[Dict]:
+    for area in topology.areas:
+        yield {"type": "area", "name": area.name, "central_node": area.central_node.name}
+        for node in area.nodes:
+            yield {
+                "type": "node",
+                "area": area.name,
+                "name": node.name,
+                "kind": node.kind,
+                "neighbors": [neighbor.name for neighbor in area.get_neighbors(node)],
+            }
+    for area in topology.areas:
+        for link in topology.get_links_from_area(area):
+            if link.medium_node:
+                yield {
+                    "type": "area_link",
+                    "area": area.name,
+                    "source": link.source_node.name,
+                    "target": link.medium_node.name,
+                }
+                yield {
+                    "type": "area_link",
+                    "area": area.name,
+                    "source": link.medium_node.name,
+                    "target": link.target_node.name,
+                }
+            else:
+                yield {
+                    "type": "area_link",
+                    "area": area.name,
+                    "source": link.source_node.name,
+                    "target": link.target_node.name,
+                }
+
+
+def write_jsonl(topology, stream: IO[str]) -> int:
+    count = 0
+    for record in iter_records(topology):
+        stream.write(json.dumps(record))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_json(topology, stream: IO[str]) -> None:
+    # Same layout as GlobalTopology.to_json, written one node at a time
+    stream.write("{")
+    first_area = True
+    for area in topology.areas:
+        stream.write(("" if first_area else ",") + json.dumps(area.name) + ":{")
+        first_area = False
+        first_node = True
+        for node in area.nodes:
+            neighbors = [neighbor.name for neighbor in area.get_neighbors(node)]
+            stream.write(("" if first_node else ",") + json.dumps(node.name) + ":" + json.dumps(neighbors))
+            first_node = False
+        stream.write("}")
+
+    stream.write(("" if first_area else ",") + '"area_links":{')
+    first_area = True
+    for area in topology.areas:
+        area_links: Dict[str, list] = {}
+        for link in topology.get_links_from_area(area):
+            if link.medium_node:
+                area_links.setdefault(link.source_node.name, []).append(link.medium_node.name)
+                area_links.setdefault(link.medium_node.name, []).append(link.target_node.name)
+            else:
+                area_links.setdefault(link.source_node.name, []).append(link.target_node.name)
+        if area_links:
+            stream.write(("" if first_area else ",") + json.dumps(area.name) + ":" + json.dumps(area_links))
+            first_area = False
+    stream.write("}}")
+
+
+def read_jsonl(stream: Iterable[str]) -> Iterator[Dict]:
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def records_to_dict(records: Iterable[Dict]) -> Dict:
+    graph_dict: Dict = {"area_links": {}}
+    for record in records:
+        if record["type"] == "area":
+            graph_dict.setdefault(record["name"], {})
+        elif record["type"] == "node":
+            graph_dict.setdefault(record["area"], {})[record["name"]] = record["neighbors"]
+        elif record["type"] == "area_link":
+            graph_dict["area_links"].setdefault(record["area"], {}).setdefault(record["source"], []).append(
+                record["target"]
+            )
+    return graph_dict